@@ -0,0 +1,174 @@
+"""
+Admission control and load shedding.
+
+Requests are rate limited with a token bucket per verified API key (or per
+client IP when API keys are not configured), then admitted against a
+concurrency limit sized to the database pool. When the service is saturated,
+low-priority work (search, sync, counts, bulk operations) is shed first and
+callers get a fast 429/503 with ``Retry-After`` instead of waiting on the pool.
+"""
+import asyncio
+import math
+import threading
+import time
+
+from starlette.responses import JSONResponse
+
+HIGH, NORMAL, LOW = 0, 1, 2
+
+EXEMPT_PATHS = {"/", "/health"}
+# Messages sent to a waiting customer go first; bulk reads and bulk writes yield under load
+HIGH_PRIORITY_SUFFIXES = ("/resend-invoice", "/resend-job-summary")
+LOW_PRIORITY_PREFIXES = ("/clients/search/", "/search", "/sync/", "/clients/counts", "/clients/bulk", "/invoices/bulk")
+
+
+def classify_request(method, path):
+    if method == "POST" and path.endswith(HIGH_PRIORITY_SUFFIXES):
+        return HIGH
+    if path.startswith(LOW_PRIORITY_PREFIXES):
+        return LOW
+    return NORMAL
+
+
+class MemoryBucketStore:
+    """In-process token buckets; state is per worker"""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    async def take(self, key, rate, burst):
+        """Take one token; returns 0 if allowed, else seconds until a token is available"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - last) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / rate
+            if len(self._buckets) > self.max_keys:
+                self._prune(now, rate, burst)
+            return wait
+
+    def _prune(self, now, rate, burst):
+        # A bucket that has had time to refill completely carries no state
+        idle = burst / rate
+        for key in [k for k, (_, last) in self._buckets.items() if now - last >= idle]:
+            del self._buckets[key]
+
+
+class RedisBucketStore:
+    """Token buckets shared by all workers through Redis (optional ``redis`` package)"""
+
+    SCRIPT = """
+    local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens') or ARGV[2])
+    local last = tonumber(redis.call('HGET', KEYS[1], 'last') or ARGV[3])
+    local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    tokens = math.min(burst, tokens + math.max(0, now - last) * rate)
+    local wait = 0
+    if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'last', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return tostring(wait)
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url):
+        import redis.asyncio  # Only needed when a shared backend is configured
+        return cls(redis.asyncio.Redis.from_url(url))
+
+    async def take(self, key, rate, burst):
+        return float(await self.client.eval(self.SCRIPT, 1, key, rate, burst, time.time()))
+
+
+class ConcurrencyLimiter:
+    """Caps in-flight requests; lower priorities may only use part of the capacity"""
+
+    def __init__(self, limit):
+        self.limit = max(1, limit)
+        # Always keep a slot free for high priority, and half the capacity for non-low work
+        self.caps = {
+            HIGH: self.limit,
+            NORMAL: max(1, self.limit - 1),
+            LOW: max(1, self.limit // 2),
+        }
+        self.in_flight = 0
+        self._condition = None
+
+    async def acquire(self, priority, timeout):
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        cap = self.caps[priority]
+        async with self._condition:
+            if self.in_flight >= cap:
+                if timeout <= 0:
+                    return False
+                try:
+                    await asyncio.wait_for(self._condition.wait_for(lambda: self.in_flight < cap), timeout)
+                except asyncio.TimeoutError:
+                    return False
+            self.in_flight += 1
+            return True
+
+    async def release(self):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware applying rate limits and priority-aware concurrency limits"""
+
+    def __init__(self, app, store, rate, burst, concurrency, max_wait, classify=classify_request):
+        self.app = app
+        self.store = store
+        self.rate = rate
+        self.burst = burst
+        self.limiter = ConcurrencyLimiter(concurrency)
+        self.max_wait = max_wait  # priority -> seconds a request may queue for a slot
+        self.classify = classify
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        wait = await self.store.take(f"rate:{self._caller(scope)}", self.rate, self.burst)
+        if wait > 0:
+            await self._reject(scope, receive, send, 429, "Rate limit exceeded", wait)
+            return
+
+        priority = self.classify(scope["method"], scope["path"])
+        if not await self.limiter.acquire(priority, self.max_wait[priority]):
+            await self._reject(scope, receive, send, 503, "Server busy, retry later", 1)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await self.limiter.release()
+
+    @staticmethod
+    def _caller(scope):
+        # Only keys verified by TenantMiddleware count: unchecked headers (an
+        # arbitrary X-API-Key or X-Tenant-ID) would give every request a fresh bucket
+        api_key = scope.get("state", {}).get("api_key")
+        if api_key:
+            return f"key:{api_key}"
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    @staticmethod
+    async def _reject(scope, receive, send, status_code, detail, retry_after):
+        response = JSONResponse(
+            status_code=status_code,
+            content={"detail": detail},
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,137 @@
+"""
+Payload size and encode-time benchmark for the negotiated response formats.
+
+Builds representative responses (a client list page, a long client history,
+a delta-sync page) and reports, for JSON and MessagePack with no compression,
+gzip and brotli, the bytes on the wire and the time to produce them. Streamed
+rows show what per-chunk flushing costs compared with compressing the whole
+body at once. Formats whose optional package is missing are skipped.
+
+    python benchmark_payloads.py
+"""
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+
+from config import BROTLI_QUALITY, GZIP_COMPRESS_LEVEL
+from payloads import JSON, MSGPACK, available_formats, brotli, compressor, encode
+from schemas import ClientLogResponse, ClientResponse
+
+ROUNDS = 20
+STREAM_CHUNK_ROWS = 100  # Rows per flushed chunk in the streamed variants
+
+FORMAT_NAMES = {JSON: "json", MSGPACK: "msgpack"}
+
+
+def print_section(title):
+    """Print a formatted section header"""
+    print(f"\n{'='*50}")
+    print(f" {title}")
+    print(f"{'='*50}")
+
+
+def make_clients(count):
+    now = datetime.utcnow()
+    return [
+        ClientResponse(
+            id=i,
+            name=f"Client {i}",
+            phone_number=f"+35191{i:07d}",
+            email=f"client{i}@example.com",
+            address=f"Rua das Flores {i}, 4050-265 Porto",
+            notes="Boiler service every autumn; prefers WhatsApp in the morning" if i % 3 == 0 else None,
+            is_archived=False,
+            created_at=now - timedelta(days=i),
+            updated_at=now - timedelta(hours=i),
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def make_history(count):
+    now = datetime.utcnow()
+    return [
+        ClientLogResponse(
+            id=i,
+            client_id=42,
+            action="updated" if i % 4 else "invoice_resent",
+            details=f"Client updated: notes, address (change {i})",
+            performed_by="system",
+            created_at=now - timedelta(minutes=i),
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def payloads():
+    """(name, JSON-compatible data) for each benchmarked response"""
+    return [
+        ("GET /clients/ (100 rows)", jsonable_encoder(make_clients(100))),
+        ("GET /clients/ (1000 rows)", jsonable_encoder(make_clients(1000))),
+        ("GET /clients/{id}/history (500 rows)", jsonable_encoder(make_history(500))),
+        ("GET /sync/clients (500 rows)", {
+            "changes": jsonable_encoder(make_clients(500)),
+            "tombstones": [],
+            "next_token": "eyJ0IjogIjIwMjYtMDEtMDFUMDA6MDA6MDAiLCAiaWQiOiA1MDB9",
+            "has_more": True,
+        }),
+    ]
+
+
+def timed(fn, rounds=ROUNDS):
+    """Result of fn() and its mean run time in milliseconds"""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        result = fn()
+    return result, (time.perf_counter() - started) * 1000 / rounds
+
+
+def compress_whole(body, encoding):
+    return compressor(encoding, GZIP_COMPRESS_LEVEL, BROTLI_QUALITY).compress(body, final=True)
+
+
+def compress_streamed(chunks, encoding):
+    stream = compressor(encoding, GZIP_COMPRESS_LEVEL, BROTLI_QUALITY)
+    output = [stream.compress(chunk, final=False) for chunk in chunks]
+    output.append(stream.compress(b"", final=True))
+    return b"".join(output)
+
+
+def benchmark(name, data):
+    print_section(name)
+    print(f"{'format':<10}{'encoding':<18}{'bytes':>10}{'vs json':>10}{'encode ms':>12}{'total ms':>11}")
+    encodings = ["gzip", "br"] if brotli else ["gzip"]
+    json_size = None
+    for media_type in available_formats():
+        body, encode_ms = timed(lambda: encode(data, media_type))
+        json_size = json_size or len(body)
+        rows = [("identity", body, 0.0)]
+        for encoding in encodings:
+            compressed, compress_ms = timed(lambda: compress_whole(body, encoding))
+            rows.append((encoding, compressed, compress_ms))
+        if isinstance(data, list):
+            chunks = [encode(data[i:i + STREAM_CHUNK_ROWS], media_type) for i in range(0, len(data), STREAM_CHUNK_ROWS)]
+            for encoding in encodings:
+                compressed, compress_ms = timed(lambda: compress_streamed(chunks, encoding))
+                rows.append((f"{encoding} streamed", compressed, compress_ms))
+
+        for encoding, output, compress_ms in rows:
+            print(
+                f"{FORMAT_NAMES[media_type]:<10}{encoding:<18}{len(output):>10}"
+                f"{len(output) / json_size:>9.0%} {encode_ms:>11.2f}{encode_ms + compress_ms:>11.2f}"
+            )
+
+
+def main():
+    """Run the payload benchmarks"""
+    print("📦 WhisperWorkPro Payload Benchmark")
+    print(f"Started at: {datetime.now().isoformat()}")
+    print(f"Formats: {', '.join(FORMAT_NAMES[f] for f in available_formats())}; "
+          f"gzip level {GZIP_COMPRESS_LEVEL}" + (f", brotli quality {BROTLI_QUALITY}" if brotli else " (brotli not installed)"))
+    for name, data in payloads():
+        benchmark(name, data)
+
+
+if __name__ == "__main__":
+    main()
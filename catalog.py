@@ -0,0 +1,139 @@
+"""
+Preloaded, versioned service catalog.
+
+Services are tiny and rarely change, so each tenant's catalog is held as an
+immutable in-memory snapshot, with its responses serialized up front in
+every available format.
+Writes bump a per-tenant version counter in the same transaction; the writing
+worker swaps in a fresh snapshot straight away and other workers notice the
+new version within ``check_interval`` seconds. Readers never query services
+and never write: a tenant without a version row is at version 0 until its
+first catalog write. At most ``max_tenants`` snapshots are kept, least
+recently used first out.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from models import CatalogVersion, Service
+from payloads import JSON, MSGPACK, available_formats, encode
+from schemas import ServiceResponse
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    tenant_id: str
+    version: int
+    services: Mapping[int, ServiceResponse]
+    bodies: Mapping[Tuple[str, bool], bytes]  # (media type, include_inactive) -> serialized list
+
+    def body(self, media_type=JSON, include_inactive=False):
+        return self.bodies[(media_type, include_inactive)]
+
+    def etag(self, media_type=JSON):
+        suffix = "-msgpack" if media_type == MSGPACK else ""
+        return f'"catalog-{self.tenant_id}-{self.version}{suffix}"'
+
+    def active(self):
+        return [service for service in self.services.values() if service.is_active]
+
+
+class ServiceCatalog:
+    """Per-tenant catalog snapshots, replaced atomically when the version changes"""
+
+    def __init__(self, check_interval=5, max_tenants=1000):
+        self.check_interval = check_interval
+        self.max_tenants = max_tenants
+        self._lock = threading.Lock()
+        self._snapshots = OrderedDict()  # (engine, tenant) -> CatalogSnapshot, least recently used first
+        self._checked_at = {}  # (engine, tenant) -> monotonic time of last version check
+
+    def snapshot(self, engine, tenant_id):
+        key = (engine, tenant_id)
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None:
+                self._snapshots.move_to_end(key)
+        if snapshot is None:
+            return self.reload(engine, tenant_id)
+        if time.monotonic() - self._checked_at.get(key, 0) >= self.check_interval:
+            self._checked_at[key] = time.monotonic()
+            with engine.connect() as conn:
+                version = self._version(conn, tenant_id)
+            if version != snapshot.version:
+                return self.reload(engine, tenant_id)
+        return snapshot
+
+    def get(self, engine, tenant_id, service_id):
+        """Look up one service (e.g. for job pricing) without touching the database"""
+        return self.snapshot(engine, tenant_id).services.get(service_id)
+
+    def reload(self, engine, tenant_id):
+        """Build a new snapshot from the database and swap it in"""
+        with engine.connect() as conn:
+            # Version is read before the rows: if a write lands in between, the
+            # snapshot is labelled older than its data and simply reloads again.
+            version = self._version(conn, tenant_id)
+            rows = conn.execute(
+                select(Service.__table__).where(Service.tenant_id == tenant_id).order_by(Service.name, Service.id)
+            ).mappings().all()
+
+        services = [ServiceResponse.model_validate(dict(row)) for row in rows]
+        lists = {
+            False: jsonable_encoder([service for service in services if service.is_active]),
+            True: jsonable_encoder(services),
+        }
+        snapshot = CatalogSnapshot(
+            tenant_id=tenant_id,
+            version=version,
+            services=MappingProxyType({service.id: service for service in services}),
+            bodies=MappingProxyType({
+                (media_type, include_inactive): encode(data, media_type)
+                for media_type in available_formats()
+                for include_inactive, data in lists.items()
+            }),
+        )
+        key = (engine, tenant_id)
+        with self._lock:
+            current = self._snapshots.get(key)
+            # Never replace a newer snapshot built concurrently by another request
+            if current is None or current.version <= snapshot.version:
+                self._snapshots[key] = snapshot
+            self._snapshots.move_to_end(key)
+            self._checked_at[key] = time.monotonic()
+            while len(self._snapshots) > self.max_tenants:
+                evicted, _ = self._snapshots.popitem(last=False)
+                self._checked_at.pop(evicted, None)
+            return self._snapshots[key]
+
+    @staticmethod
+    def bump_version(db, tenant_id):
+        """Increment the tenant's catalog version inside the caller's transaction"""
+        bump = (
+            update(CatalogVersion)
+            .where(CatalogVersion.tenant_id == tenant_id)
+            .values(version=CatalogVersion.version + 1)
+        )
+        if db.execute(bump).rowcount:
+            return
+        try:
+            # First write for this tenant: version 0 (no row) becomes 1
+            with db.begin_nested():
+                db.add(CatalogVersion(tenant_id=tenant_id, version=1))
+        except IntegrityError:
+            # Created concurrently by another worker
+            db.execute(bump)
+
+    @staticmethod
+    def _version(conn, tenant_id):
+        version = conn.execute(
+            select(CatalogVersion.version).where(CatalogVersion.tenant_id == tenant_id)
+        ).scalar()
+        return version or 0
@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -17,9 +18,56 @@ ALLOWED_ORIGINS = ["*"]  # Configure for production
 # Database Configuration
 ECHO_SQL = False  # Set to True for debugging SQL queries
 
+# Multi-tenancy
+# Used when a request has no X-Tenant-ID header, and the tenant of rows that predate tenancy.
+# Don't change it once data exists: rows keep the tenant they were written with.
+DEFAULT_TENANT = os.getenv("DEFAULT_TENANT", "default")
+# JSON object mapping API keys to the tenant they belong to, e.g. {"key-abc": "bigco"}.
+# When set, every request needs a known X-API-Key and its tenant comes from the key;
+# when empty, X-Tenant-ID is trusted as given (routing only, no isolation between callers).
+API_KEYS = json.loads(os.getenv("API_KEYS", "{}"))
+# JSON object mapping tenant ids to dedicated database URLs, e.g. {"bigco": "postgresql://..."}
+TENANT_DATABASE_URLS = json.loads(os.getenv("TENANT_DATABASE_URLS", "{}"))
+
+# Admission control
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "20"))  # Per API key (or tenant + IP)
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "100"))
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")  # Share buckets across workers; in-process when unset
+# Seconds a request may queue for a free slot, by priority (high, normal, low)
+ADMISSION_MAX_WAIT_SECONDS = (2.0, 1.0, 0.0)
+
 # Pagination defaults
 DEFAULT_PAGE_SIZE = 100
 MAX_PAGE_SIZE = 1000
 
+# Totals and faceted counts
+COUNT_EXACT_THRESHOLD = 10000  # Larger results are estimated from planner statistics on Postgres
+COUNT_CACHE_SECONDS = 30  # How long planner estimates are reused; exact counts are never cached
+
+# Bulk client operations
+BULK_CHUNK_SIZE = 500  # Rows updated per transaction, to keep lock times short
+MAX_BULK_CLIENT_IDS = 10000  # Explicit ids per bulk request
+
+# Delta sync
+SYNC_PAGE_SIZE = 500
+SYNC_SAFETY_LAG_SECONDS = 5  # Changes younger than this wait for the next sync, so late commits aren't skipped
+
+# Service catalog
+CATALOG_VERSION_CHECK_SECONDS = 5  # How stale another worker's catalog write can look
+CATALOG_MAX_TENANTS = 1000  # Catalog snapshots kept in memory per worker, least recently used evicted
+
+# Response formats and compression
+COMPRESSION_MINIMUM_SIZE = 1024  # Bytes; smaller bodies gain little and still cost CPU
+GZIP_COMPRESS_LEVEL = 6
+BROTLI_QUALITY = 5  # Roughly gzip's speed with smaller output; 11 is far too slow for dynamic responses
+
 # Search configuration
-MAX_SEARCH_RESULTS = 50
\ No newline at end of file
+MAX_SEARCH_RESULTS = 50
+SEARCH_CANDIDATE_LIMIT = 1000  # Full-text matches ranked per query (unordered, so ranking is approximate for common terms)
+
+# Invoice numbering
+INVOICE_NUMBER_PREFIX = os.getenv("INVOICE_NUMBER_PREFIX", "INV")
+# Per-business prefixes as JSON, e.g. {"bigco": "BIG"}; other tenants use INVOICE_NUMBER_PREFIX
+INVOICE_NUMBER_PREFIXES = json.loads(os.getenv("INVOICE_NUMBER_PREFIXES", "{}"))
+INVOICE_NUMBER_BLOCK_SIZE = int(os.getenv("INVOICE_NUMBER_BLOCK_SIZE", "50"))  # Numbers reserved per worker round trip
+MAX_BULK_INVOICES = 500
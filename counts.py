@@ -0,0 +1,138 @@
+"""
+Cheap row counts for list endpoints.
+
+Small result sets are counted exactly. On Postgres, large ones are estimated
+from planner statistics (``pg_class.reltuples``, ``EXPLAIN`` row estimates and
+``pg_stats`` value frequencies) so a page request never pays for a full scan
+just to report a total. Estimates are cached briefly per query; the cache key
+is the literal SQL, so tenant filters keep tenants' counts apart. Exact counts
+are cheap by definition and never cached, so they are never stale.
+"""
+import json
+import threading
+import time
+
+from sqlalchemy import Boolean, func, text
+
+
+class TTLCache:
+    """Tiny thread-safe cache whose entries expire after ``ttl`` seconds"""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            self._entries.pop(key, None)
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+
+class RowCounter:
+    """Counts query results exactly when small and by planner estimate when large"""
+
+    def __init__(self, exact_threshold=10000, cache_seconds=30):
+        self.exact_threshold = exact_threshold
+        self._cache = TTLCache(cache_seconds)
+
+    def count(self, db, query):
+        """Return ``(count, estimated)`` for the rows matched by an ORM query"""
+        query = query.order_by(None).limit(None).offset(None)
+        sql = _literal_sql(db, query.statement)
+        cached = self._cache.get(("count", sql))
+        if cached is not None:
+            return cached
+
+        result = None
+        if _is_postgres(db) and not self._table_is_small(db, query):
+            planned = _planned_rows(db, sql)
+            if planned is not None and planned >= self.exact_threshold:
+                result = (planned, True)
+        if result is None:
+            return query.count(), False
+
+        self._cache.set(("count", sql), result)
+        return result
+
+    def facets(self, db, column, *criteria):
+        """Return ``({value: count}, estimated)`` for a low-cardinality column,
+        over the rows matching ``criteria`` (e.g. the current tenant)"""
+        sql = _literal_sql(db, db.query(column).filter(*criteria).statement)
+        cached = self._cache.get(("facets", sql))
+        if cached is not None:
+            return cached
+
+        result = None
+        if _is_postgres(db):
+            planned = _planned_rows(db, sql)
+            if planned is not None and planned >= self.exact_threshold:
+                # Column statistics are table-wide; scale them to the matched rows
+                frequencies = _value_frequencies(db, column.table.name, column)
+                if frequencies:
+                    result = ({value: int(freq * planned) for value, freq in frequencies.items()}, True)
+        if result is None:
+            rows = db.query(column, func.count()).filter(*criteria).group_by(column).all()
+            return {value: count for value, count in rows}, False
+
+        self._cache.set(("facets", sql), result)
+        return result
+
+    def _table_is_small(self, db, query):
+        tables = {desc["entity"].__table__.name for desc in query.column_descriptions if desc["entity"] is not None}
+        if len(tables) != 1:
+            return False
+        reltuples = _reltuples(db, tables.pop())
+        return reltuples is not None and reltuples < self.exact_threshold
+
+
+def _is_postgres(db):
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _literal_sql(db, statement):
+    return str(statement.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}))
+
+
+def _reltuples(db, table):
+    """Planner's row estimate for a whole table, or None if it was never analyzed"""
+    value = db.execute(
+        text("SELECT reltuples FROM pg_class WHERE relname = :table AND relkind IN ('r', 'p')"),
+        {"table": table}
+    ).scalar()
+    return value if value is not None and value >= 0 else None
+
+
+def _planned_rows(db, sql):
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    try:
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def _value_frequencies(db, table, column):
+    """Most-common-value frequencies from ``pg_stats``; these cover every value of
+    status-like columns, which is all facets are used for"""
+    row = db.execute(
+        text(
+            "SELECT most_common_vals::text::text[], most_common_freqs FROM pg_stats "
+            "WHERE tablename = :table AND attname = :column"
+        ),
+        {"table": table, "column": column.name}
+    ).first()
+    if not row or row[0] is None:
+        return None
+    values = row[0]
+    if isinstance(column.type, Boolean):
+        values = [value in ("t", "true") for value in values]
+    return dict(zip(values, row[1]))
@@ -0,0 +1,91 @@
+"""
+Server-side allocation of human-readable invoice numbers.
+
+Numbers look like ``INV-2026-000123`` (prefix, year, counter). Instead of
+locking a counter row for every invoice, each worker reserves a block of
+numbers with a single ``UPDATE ... RETURNING`` and hands them out from
+memory. Numbers from a block that is not fully used (e.g. on restart) are
+skipped, so the sequence can have gaps but never duplicates.
+"""
+import re
+import threading
+from datetime import datetime
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from models import InvoiceNumberSequence
+
+
+class InvoiceNumberAllocator:
+    """Hands out invoice numbers from per-worker reserved blocks"""
+
+    def __init__(self, block_size=50):
+        if block_size < 1:
+            raise ValueError("block_size must be at least 1")
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        # (engine, tenant, prefix, year) -> [next number to hand out, end of block (exclusive)]
+        self._blocks = {}
+
+    def next_number(self, engine, tenant_id, prefix, year=None):
+        """Return the next formatted invoice number for a tenant, prefix and year"""
+        return self.next_numbers(engine, tenant_id, prefix, 1, year)[0]
+
+    def next_numbers(self, engine, tenant_id, prefix, count, year=None):
+        """Return ``count`` formatted invoice numbers for a tenant, prefix and year"""
+        year = year or datetime.utcnow().year
+        key = (engine, tenant_id, prefix, year)
+        numbers = []
+        with self._lock:
+            while len(numbers) < count:
+                block = self._blocks.get(key)
+                if not block or block[0] >= block[1]:
+                    # Reserve enough for the whole request in one round trip
+                    size = max(self.block_size, count - len(numbers))
+                    block = list(self._reserve_block(engine, tenant_id, prefix, year, size))
+                    self._blocks[key] = block
+                take = min(count - len(numbers), block[1] - block[0])
+                numbers.extend(range(block[0], block[0] + take))
+                block[0] += take
+        return [self.format_number(prefix, year, n) for n in numbers]
+
+    @staticmethod
+    def format_number(prefix, year, value):
+        return f"{prefix}-{year}-{value:06d}"
+
+    @staticmethod
+    def is_reserved(prefix, number):
+        """Whether ``number`` falls in the namespace this allocator hands out for ``prefix``"""
+        return re.match(rf"{re.escape(prefix)}-\d{{4}}-", number, re.IGNORECASE) is not None
+
+    def _reserve_block(self, engine, tenant_id, prefix, year, size):
+        """Atomically claim ``size`` numbers; returns (start, end) with end exclusive"""
+        stmt = (
+            update(InvoiceNumberSequence)
+            .where(
+                InvoiceNumberSequence.tenant_id == tenant_id,
+                InvoiceNumberSequence.prefix == prefix,
+                InvoiceNumberSequence.year == year
+            )
+            .values(next_value=InvoiceNumberSequence.next_value + size)
+            .returning(InvoiceNumberSequence.next_value)
+        )
+        # Own short transaction, so the row lock is held only for this statement
+        # and never for the lifetime of the caller's request.
+        for _ in range(2):
+            with engine.begin() as conn:
+                end = conn.execute(stmt).scalar()
+            if end is not None:
+                return end - size, end
+            try:
+                with engine.begin() as conn:
+                    conn.execute(
+                        InvoiceNumberSequence.__table__.insert().values(
+                            tenant_id=tenant_id, prefix=prefix, year=year, next_value=1
+                        )
+                    )
+            except IntegrityError:
+                # Another worker created the row first; just retry the update
+                pass
+        raise RuntimeError(f"Could not reserve invoice numbers for {tenant_id}/{prefix}-{year}")
@@ -1,14 +1,37 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, status
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, Boolean
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, Boolean, insert, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.sql import func
 from datetime import datetime
 from typing import List, Optional
 import os
-from models import Client, ClientLog, Base
-from schemas import ClientCreate, ClientUpdate, ClientResponse, ClientLogResponse, MergeClientsRequest
+from models import Client, ClientLog, Invoice, Job, Service, Base
+from schemas import (
+    ClientCreate, ClientUpdate, ClientResponse, ClientLogResponse, MergeClientsRequest,
+    InvoiceCreate, InvoiceResponse, BulkArchiveRequest, BulkUpdateRequest, BulkClientSelection,
+    BulkOperationResponse, SyncClientsResponse, SyncJobsResponse, SyncInvoicesResponse, SearchResponse,
+    ServiceCreate, ServiceUpdate, ServiceResponse
+)
+from config import (
+    INVOICE_NUMBER_PREFIX, INVOICE_NUMBER_PREFIXES, INVOICE_NUMBER_BLOCK_SIZE, MAX_BULK_INVOICES,
+    COUNT_EXACT_THRESHOLD, COUNT_CACHE_SECONDS, BULK_CHUNK_SIZE, DEFAULT_TENANT, TENANT_DATABASE_URLS, API_KEYS,
+    SYNC_PAGE_SIZE, SYNC_SAFETY_LAG_SECONDS, MAX_PAGE_SIZE,
+    RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST, RATE_LIMIT_REDIS_URL, ADMISSION_MAX_WAIT_SECONDS,
+    MAX_SEARCH_RESULTS, SEARCH_CANDIDATE_LIMIT, CATALOG_VERSION_CHECK_SECONDS, CATALOG_MAX_TENANTS,
+    COMPRESSION_MINIMUM_SIZE, GZIP_COMPRESS_LEVEL, BROTLI_QUALITY
+)
+from counts import RowCounter
+from invoice_numbers import InvoiceNumberAllocator
+from tenancy import TenantMiddleware, TenantRouter
+from sync import InvalidSyncToken, changed_since, decode_token, encode_token
+from admission import AdmissionControlMiddleware, MemoryBucketStore, RedisBucketStore
+from search import FullTextSearch
+from catalog import ServiceCatalog
+from payloads import CompressionMiddleware, ContentNegotiationMiddleware, NegotiatedResponse, response_format
 import uvicorn
 
 # Database setup
@@ -18,27 +41,48 @@ import os
 # Get URL from Render environment only
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-# Convert postgres:// to postgresql:// for SQLAlchemy compatibility
-if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
-
-# Force SSL for Supabase
-if DATABASE_URL and "?sslmode=" not in DATABASE_URL:
-    DATABASE_URL += "?sslmode=require"
-
-# Configure engine with SSL and connection pooling
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    pool_timeout=20,
-    max_overflow=0
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def make_engine(url):
+    """Create an engine with the deployment's SSL and pooling settings"""
+    # Convert postgres:// to postgresql:// for SQLAlchemy compatibility
+    if url and url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    
+    # Force SSL for Supabase
+    if url and "?sslmode=" not in url:
+        url += "?sslmode=require"
+    
+    # Configure engine with SSL and connection pooling
+    return create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_recycle=300,
+        pool_timeout=20,
+        max_overflow=0
+    )
+
+engine = make_engine(DATABASE_URL)
 
 # Create tables
 Base.metadata.create_all(bind=engine)
 
+# Tenants listed in TENANT_DATABASE_URLS get their own database; everyone else shares `engine`
+tenant_router = TenantRouter(engine, TENANT_DATABASE_URLS, make_engine, Base.metadata)
+
+# Invoice numbers are reserved in blocks per worker process
+invoice_numbers = InvoiceNumberAllocator(block_size=INVOICE_NUMBER_BLOCK_SIZE)
+
+# Totals for list endpoints: exact when small, planner estimates when large
+row_counter = RowCounter(exact_threshold=COUNT_EXACT_THRESHOLD, cache_seconds=COUNT_CACHE_SECONDS)
+
+# Full-text search over client notes and activity logs
+full_text_search = FullTextSearch(candidate_limit=SEARCH_CANDIDATE_LIMIT)
+
+# Service catalog is served from memory; preload the default tenant's at startup
+service_catalog = ServiceCatalog(
+    check_interval=CATALOG_VERSION_CHECK_SECONDS, max_tenants=CATALOG_MAX_TENANTS
+)
+service_catalog.reload(engine, DEFAULT_TENANT)
+
 # FastAPI app
 app = FastAPI(
     title="WhisperWorkPro API",
@@ -46,6 +90,33 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Middleware added last runs first:
+# CORS -> tenant resolution -> admission control -> compression -> format negotiation
+
+# Read endpoints answer in JSON or MessagePack, per the Accept header
+app.add_middleware(ContentNegotiationMiddleware)
+
+# Compress large (and streamed) responses with brotli or gzip, per Accept-Encoding
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESSION_MINIMUM_SIZE,
+    gzip_level=GZIP_COMPRESS_LEVEL,
+    brotli_quality=BROTLI_QUALITY,
+)
+
+# Shed load before requests queue on the connection pool (one in-flight request per pooled connection)
+app.add_middleware(
+    AdmissionControlMiddleware,
+    store=RedisBucketStore.from_url(RATE_LIMIT_REDIS_URL) if RATE_LIMIT_REDIS_URL else MemoryBucketStore(),
+    rate=RATE_LIMIT_PER_SECOND,
+    burst=RATE_LIMIT_BURST,
+    concurrency=engine.pool.size(),
+    max_wait=dict(enumerate(ADMISSION_MAX_WAIT_SECONDS)),
+)
+
+# Resolve the tenant (from the API key, or the X-Tenant-ID header when no keys are configured)
+app.add_middleware(TenantMiddleware, default_tenant=DEFAULT_TENANT, api_keys=API_KEYS)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -53,11 +124,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Total-Count-Estimated", "Retry-After"],
 )
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
+def get_tenant(request: Request) -> str:
+    return request.state.tenant_id
+
+# Dependency to get DB session, routed to the tenant's database
+def get_db(tenant_id: str = Depends(get_tenant)):
+    db = tenant_router.session_for(tenant_id)
     try:
         yield db
     finally:
@@ -71,26 +146,62 @@ async def root():
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow()}
 
+def _client_columns(fields: Optional[str]):
+    """Turn a comma-separated ``fields`` parameter into Client columns (None = full rows)"""
+    if fields is None:
+        return None
+    names = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    if not names:
+        raise HTTPException(status_code=400, detail="fields must name at least one field")
+    unknown = [name for name in names if name not in ClientResponse.model_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown field(s): {', '.join(unknown)}. "
+                   f"Allowed: {', '.join(ClientResponse.model_fields)}"
+        )
+    return [getattr(Client, name) for name in names]
+
+def _client_search_filter(q: str):
+    """Match clients by name, phone_number, or email"""
+    return (
+        Client.name.ilike(f"%{q}%") |
+        Client.phone_number.ilike(f"%{q}%") |
+        Client.email.ilike(f"%{q}%")
+    )
+
+def _projected_response(rows):
+    """Serialize column-select rows as a trimmed payload, bypassing the full response model"""
+    return NegotiatedResponse(content=jsonable_encoder([row._asdict() for row in rows]))
+
 # Client endpoints
 @app.post("/clients/", response_model=ClientResponse, status_code=status.HTTP_201_CREATED)
-async def create_client(client: ClientCreate, db: Session = Depends(get_db)):
+async def create_client(
+    client: ClientCreate,
+    tenant_id: str = Depends(get_tenant),
+    db: Session = Depends(get_db)
+):
     """Create a new client"""
     try:
         # Check if client with phone already exists
-        existing_client = db.query(Client).filter(Client.phone_number == client.phone_number).first()
+        existing_client = db.query(Client).filter(
+            Client.tenant_id == tenant_id,
+            Client.phone_number == client.phone_number
+        ).first()
         if existing_client and not existing_client.is_archived:
             raise HTTPException(
                 status_code=400, 
                 detail="Active client with this phone number already exists"
             )
         
-        db_client = Client(**client.dict())
+        db_client = Client(**client.dict(), tenant_id=tenant_id)
         db.add(db_client)
         db.commit()
         db.refresh(db_client)
         
         # Log the creation
         log_entry = ClientLog(
+            tenant_id=tenant_id,
             client_id=db_client.id,
             action="created",
             details=f"Client {db_client.name} created",
@@ -104,25 +215,61 @@ async def create_client(client: ClientCreate, db: Session = Depends(get_db)):
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/clients/", response_model=List[ClientResponse])
+@app.get("/clients/", response_model=List[ClientResponse], response_class=NegotiatedResponse)
 async def get_clients(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
     include_archived: bool = False,
+    fields: Optional[str] = None,
+    include_total: bool = False,
+    tenant_id: str = Depends(get_tenant),
     db: Session = Depends(get_db)
 ):
-    """Get all clients with pagination"""
-    query = db.query(Client)
+    """Get all clients with pagination; ``fields=id,name`` returns only those columns.
+    
+    With ``include_total=true`` the total is sent in ``X-Total-Count``; large
+    totals are planner estimates, flagged by ``X-Total-Count-Estimated: true``.
+    """
+    columns = _client_columns(fields)
+    query = db.query(*columns) if columns else db.query(Client)
+    query = query.filter(Client.tenant_id == tenant_id)
     if not include_archived:
         query = query.filter(Client.is_archived == False)
     
     clients = query.offset(skip).limit(limit).all()
-    return clients
+    if columns:
+        response = _projected_response(clients)
+    if include_total:
+        total, estimated = row_counter.count(db, query.with_entities(Client.id))
+        response.headers["X-Total-Count"] = str(total)
+        response.headers["X-Total-Count-Estimated"] = "true" if estimated else "false"
+    return response if columns else clients
 
-@app.get("/clients/{client_id}", response_model=ClientResponse)
-async def get_client(client_id: int, db: Session = Depends(get_db)):
+@app.get("/clients/counts", response_class=NegotiatedResponse)
+async def get_client_counts(tenant_id: str = Depends(get_tenant), db: Session = Depends(get_db)):
+    """Faceted counts: clients by archived state, jobs and invoices by status"""
+    archived, clients_estimated = row_counter.facets(db, Client.is_archived, Client.tenant_id == tenant_id)
+    jobs, jobs_estimated = row_counter.facets(db, Job.status, Job.tenant_id == tenant_id)
+    invoices, invoices_estimated = row_counter.facets(db, Invoice.status, Invoice.tenant_id == tenant_id)
+    
+    return {
+        "clients": {"active": archived.get(False, 0), "archived": archived.get(True, 0)},
+        "jobs": jobs,
+        "invoices": invoices,
+        "estimated": [
+            name for name, estimated in (
+                ("clients", clients_estimated),
+                ("jobs", jobs_estimated),
+                ("invoices", invoices_estimated),
+            ) if estimated
+        ]
+    }
+
+@app.get("/clients/{client_id}", response_model=ClientResponse, response_class=NegotiatedResponse)
+async def get_client(client_id: int, tenant_id: str = Depends(get_tenant), db: Session = Depends(get_db)):
     """Get a specific client by ID"""
-    client = db.query(Client).filter(Client.id == client_id).first()
+    client = db.query(Client).filter(Client.tenant_id == tenant_id, Client.id == client_id).first()
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
     return client
@@ -131,11 +278,12 @@ async def get_client(client_id: int, db: Session = Depends(get_db)):
 async def update_client(
     client_id: int, 
     client_update: ClientUpdate, 
+    tenant_id: str = Depends(get_tenant),
     db: Session = Depends(get_db)
 ):
     """Update a client"""
     try:
-        client = db.query(Client).filter(Client.id == client_id).first()
+        client = db.query(Client).filter(Client.tenant_id == tenant_id, Client.id == client_id).first()
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         
@@ -152,7 +300,7 @@ async def update_client(
         for field, value in update_data.items():
             setattr(client, field, value)
         
-        client.updated_at = datetime.utcnow()
+        client.updated_at = func.now()
         db.commit()
         db.refresh(client)
         
@@ -164,6 +312,7 @@ async def update_client(
         
         if changes:
             log_entry = ClientLog(
+                tenant_id=tenant_id,
                 client_id=client.id,
                 action="updated",
                 details=f"Client updated: {', '.join(changes)}",
@@ -178,19 +327,20 @@ async def update_client(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/clients/{client_id}")
-async def archive_client(client_id: int, db: Session = Depends(get_db)):
+async def archive_client(client_id: int, tenant_id: str = Depends(get_tenant), db: Session = Depends(get_db)):
     """Archive a client (soft delete)"""
     try:
-        client = db.query(Client).filter(Client.id == client_id).first()
+        client = db.query(Client).filter(Client.tenant_id == tenant_id, Client.id == client_id).first()
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         
         client.is_archived = True
-        client.updated_at = datetime.utcnow()
+        client.updated_at = func.now()
         db.commit()
         
         # Log the archival
         log_entry = ClientLog(
+            tenant_id=tenant_id,
             client_id=client.id,
             action="archived",
             details=f"Client {client.name} archived",
@@ -204,12 +354,123 @@ async def archive_client(client_id: int, db: Session = Depends(get_db)):
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+# Bulk client endpoints
+def _select_client_ids(
+    db: Session, tenant_id: str, selection: BulkClientSelection, include_archived: bool
+) -> List[int]:
+    """Resolve explicit ids and/or a filter to a sorted list of the tenant's client ids"""
+    query = db.query(Client.id).filter(Client.tenant_id == tenant_id)
+    if selection.client_ids:
+        query = query.filter(Client.id.in_(selection.client_ids))
+    if selection.filter:
+        if selection.filter.q:
+            query = query.filter(_client_search_filter(selection.filter.q))
+        if selection.filter.updated_before:
+            query = query.filter(Client.updated_at < selection.filter.updated_before)
+        if selection.filter.created_before:
+            query = query.filter(Client.created_at < selection.filter.created_before)
+    if not include_archived:
+        query = query.filter(Client.is_archived == False)
+    return [row.id for row in query.order_by(Client.id)]
+
+def _bulk_update_clients(
+    db: Session, tenant_id: str, client_ids: List[int], values: dict, extra_filter, action: str, details
+):
+    """Apply one set-based UPDATE ... RETURNING and one multi-row log insert per chunk.
+    
+    Each chunk is its own transaction so no lock is held for the whole batch.
+    Returns the ids that were actually changed.
+    """
+    changed_ids = []
+    for start in range(0, len(client_ids), BULK_CHUNK_SIZE):
+        chunk = client_ids[start:start + BULK_CHUNK_SIZE]
+        stmt = (
+            update(Client)
+            .where(Client.tenant_id == tenant_id, Client.id.in_(chunk), *extra_filter)
+            .values(**values, updated_at=func.now())
+            .returning(Client.id, Client.name)
+            .execution_options(synchronize_session=False)
+        )
+        rows = db.execute(stmt).all()
+        if rows:
+            db.execute(insert(ClientLog), [
+                {
+                    "tenant_id": tenant_id,
+                    "client_id": row.id,
+                    "action": action,
+                    "details": details(row),
+                    "performed_by": "system"
+                }
+                for row in rows
+            ])
+        db.commit()
+        changed_ids.extend(row.id for row in rows)
+    return changed_ids
+
+# Bulk handlers are plain functions so FastAPI runs them in the threadpool.
+@app.post("/clients/bulk-archive", response_model=BulkOperationResponse)
+def bulk_archive_clients(
+    request: BulkArchiveRequest,
+    tenant_id: str = Depends(get_tenant),
+    db: Session = Depends(get_db)
+):
+    """Archive many clients selected by id and/or filter"""
+    try:
+        client_ids = _select_client_ids(db, tenant_id, request, include_archived=False)
+        archived_ids = _bulk_update_clients(
+            db, tenant_id, client_ids,
+            values={"is_archived": True},
+            extra_filter=[Client.is_archived == False],
+            action="archived",
+            details=lambda row: f"Client {row.name} archived (bulk)"
+        )
+        return {
+            "message": f"{len(archived_ids)} client(s) archived successfully",
+            "count": len(archived_ids),
+            "client_ids": archived_ids
+        }
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.patch("/clients/bulk", response_model=BulkOperationResponse)
+def bulk_update_clients(
+    request: BulkUpdateRequest,
+    tenant_id: str = Depends(get_tenant),
+    db: Session = Depends(get_db)
+):
+    """Apply the same field changes to many clients selected by id and/or filter"""
+    update_data = request.changes.dict(exclude_unset=True)
+    changes = ", ".join(f"{field} → '{value}'" for field, value in update_data.items())
+    try:
+        client_ids = _select_client_ids(db, tenant_id, request, include_archived=request.include_archived)
+        updated_ids = _bulk_update_clients(
+            db, tenant_id, client_ids,
+            values=update_data,
+            extra_filter=[] if request.include_archived else [Client.is_archived == False],
+            action="updated",
+            details=lambda row: f"Client updated (bulk): {changes}"
+        )
+        return {
+            "message": f"{len(updated_ids)} client(s) updated successfully",
+            "count": len(updated_ids),
+            "client_ids": updated_ids
+        }
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/clients/merge")
-async def merge_clients(merge_request: MergeClientsRequest, db: Session = Depends(get_db)):
+async def merge_clients(
+    merge_request: MergeClientsRequest,
+    tenant_id: str = Depends(get_tenant),
+    db: Session = Depends(get_db)
+):
     """Merge two clients"""
     try:
-        primary_client = db.query(Client).filter(Client.id == merge_request.primary_client_id).first()
-        secondary_client = db.query(Client).filter(Client.id == merge_request.secondary_client_id).first()
+        clients = db.query(Client).filter(Client.tenant_id == tenant_id)
+        primary_client = clients.filter(Client.id == merge_request.primary_client_id).first()
+        secondary_client = clients.filter(Client.id == merge_request.secondary_client_id).first()
         
         if not primary_client or not secondary_client:
             raise HTTPException(status_code=404, detail="One or both clients not found")
@@ -231,13 +492,15 @@ async def merge_clients(merge_request: MergeClientsRequest, db: Session = Depend
         
         # Archive the secondary client
         secondary_client.is_archived = True
-        secondary_client.updated_at = datetime.utcnow()
-        primary_client.updated_at = datetime.utcnow()
+        secondary_client.merged_into_id = primary_client.id
+        secondary_client.updated_at = func.now()
+        primary_client.updated_at = func.now()
         
         db.commit()
         
         # Log the merge
         log_entry = ClientLog(
+            tenant_id=tenant_id,
             client_id=primary_client.id,
             action="merged",
             details=f"Merged with client {secondary_client.name} (ID: {secondary_client.id}). " + 
@@ -247,6 +510,7 @@ async def merge_clients(merge_request: MergeClientsRequest, db: Session = Depend
         db.add(log_entry)
         
         secondary_log_entry = ClientLog(
+            tenant_id=tenant_id,
             client_id=secondary_client.id,
             action="merged_into",
             details=f"Merged into client {primary_client.name} (ID: {primary_client.id})",
@@ -264,20 +528,23 @@ async def merge_clients(merge_request: MergeClientsRequest, db: Session = Depend
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/clients/{client_id}/history", response_model=List[ClientLogResponse])
-async def get_client_history(client_id: int, db: Session = Depends(get_db)):
+@app.get("/clients/{client_id}/history", response_model=List[ClientLogResponse], response_class=NegotiatedResponse)
+async def get_client_history(client_id: int, tenant_id: str = Depends(get_tenant), db: Session = Depends(get_db)):
     """Get client history/logs"""
-    client = db.query(Client).filter(Client.id == client_id).first()
+    client = db.query(Client).filter(Client.tenant_id == tenant_id, Client.id == client_id).first()
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
     
-    logs = db.query(ClientLog).filter(ClientLog.client_id == client_id).order_by(ClientLog.created_at.desc()).all()
+    logs = db.query(ClientLog).filter(
+        ClientLog.tenant_id == tenant_id,
+        ClientLog.client_id == client_id
+    ).order_by(ClientLog.created_at.desc()).all()
     return logs
 
 @app.post("/clients/{client_id}/resend-invoice")
-async def resend_last_invoice(client_id: int, db: Session = Depends(get_db)):
+async def resend_last_invoice(client_id: int, tenant_id: str = Depends(get_tenant), db: Session = Depends(get_db)):
     """Resend last invoice to client"""
-    client = db.query(Client).filter(Client.id == client_id).first()
+    client = db.query(Client).filter(Client.tenant_id == tenant_id, Client.id == client_id).first()
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
     
@@ -288,6 +555,7 @@ async def resend_last_invoice(client_id: int, db: Session = Depends(get_db)):
     
     # For now, we'll just log the action
     log_entry = ClientLog(
+        tenant_id=tenant_id,
         client_id=client_id,
         action="invoice_resent",
         details=f"Last invoice resent to {client.name}",
@@ -299,9 +567,9 @@ async def resend_last_invoice(client_id: int, db: Session = Depends(get_db)):
     return {"message": f"Invoice resent to {client.name} at {client.phone_number}"}
 
 @app.post("/clients/{client_id}/resend-job-summary")
-async def resend_job_summary(client_id: int, db: Session = Depends(get_db)):
+async def resend_job_summary(client_id: int, tenant_id: str = Depends(get_tenant), db: Session = Depends(get_db)):
     """Resend last job summary to client"""
-    client = db.query(Client).filter(Client.id == client_id).first()
+    client = db.query(Client).filter(Client.tenant_id == tenant_id, Client.id == client_id).first()
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
     
@@ -313,6 +581,7 @@ async def resend_job_summary(client_id: int, db: Session = Depends(get_db)):
     
     # For now, we'll just log the action
     log_entry = ClientLog(
+        tenant_id=tenant_id,
         client_id=client_id,
         action="job_summary_resent",
         details=f"Last job summary resent to {client.name}",
@@ -324,26 +593,277 @@ async def resend_job_summary(client_id: int, db: Session = Depends(get_db)):
     return {"message": f"Job summary resent to {client.name} at {client.phone_number}"}
 
 # Search endpoint
-@app.get("/clients/search/", response_model=List[ClientResponse])
+@app.get("/clients/search/", response_model=List[ClientResponse], response_class=NegotiatedResponse)
 async def search_clients(
     q: str,
     include_archived: bool = False,
+    fields: Optional[str] = None,
+    tenant_id: str = Depends(get_tenant),
     db: Session = Depends(get_db)
 ):
-    """Search clients by name, phone, or email"""
-    query = db.query(Client)
+    """Search clients by name, phone, or email; ``fields`` works as in ``GET /clients/``"""
+    columns = _client_columns(fields)
+    query = db.query(*columns) if columns else db.query(Client)
+    query = query.filter(Client.tenant_id == tenant_id)
     if not include_archived:
         query = query.filter(Client.is_archived == False)
     
-    # Search in name, phone_number, and email
-    search_filter = (
-        Client.name.ilike(f"%{q}%") |
-        Client.phone_number.ilike(f"%{q}%") |
-        Client.email.ilike(f"%{q}%")
+    clients = query.filter(_client_search_filter(q)).limit(50).all()
+    if columns:
+        return _projected_response(clients)
+    return clients
+
+# Service catalog endpoints
+@app.get("/services", response_model=List[ServiceResponse])
+def get_services(
+    request: Request,
+    include_inactive: bool = False,
+    tenant_id: str = Depends(get_tenant)
+):
+    """List the service catalog from the in-memory snapshot; supports If-None-Match"""
+    snapshot = service_catalog.snapshot(tenant_router.engine_for(tenant_id), tenant_id)
+    media_type = response_format()
+    etag = snapshot.etag(media_type)
+    headers = {"ETag": etag, "Vary": "X-Tenant-ID, Accept"}
+    # Weak comparison: compression marks the ETag sent to the client as weak
+    if etag in [tag.strip().removeprefix("W/") for tag in request.headers.get("If-None-Match", "").split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=snapshot.body(media_type, include_inactive), media_type=media_type, headers=headers)
+
+@app.get("/services/{service_id}", response_model=ServiceResponse, response_class=NegotiatedResponse)
+def get_service(service_id: int, tenant_id: str = Depends(get_tenant)):
+    """Get a specific service from the in-memory catalog"""
+    service = service_catalog.get(tenant_router.engine_for(tenant_id), tenant_id, service_id)
+    if not service:
+        raise HTTPException(status_code=404, detail="Service not found")
+    return service
+
+@app.post("/services", response_model=ServiceResponse, status_code=status.HTTP_201_CREATED)
+def create_service(
+    service: ServiceCreate,
+    tenant_id: str = Depends(get_tenant),
+    db: Session = Depends(get_db)
+):
+    """Add a service and publish a new catalog version"""
+    try:
+        db_service = Service(**service.dict(), tenant_id=tenant_id)
+        db.add(db_service)
+        service_catalog.bump_version(db, tenant_id)
+        db.commit()
+        service_id = db_service.id
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    snapshot = service_catalog.reload(db.get_bind(), tenant_id)
+    return snapshot.services[service_id]
+
+@app.put("/services/{service_id}", response_model=ServiceResponse)
+def update_service(
+    service_id: int,
+    service_update: ServiceUpdate,
+    tenant_id: str = Depends(get_tenant),
+    db: Session = Depends(get_db)
+):
+    """Update a service (including activating/deactivating it) and publish a new catalog version"""
+    service = db.query(Service).filter(Service.tenant_id == tenant_id, Service.id == service_id).first()
+    if not service:
+        raise HTTPException(status_code=404, detail="Service not found")
+    try:
+        for field, value in service_update.dict(exclude_unset=True).items():
+            setattr(service, field, value)
+        service.updated_at = func.now()
+        service_catalog.bump_version(db, tenant_id)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    snapshot = service_catalog.reload(db.get_bind(), tenant_id)
+    return snapshot.services[service_id]
+
+# Full-text search endpoint
+@app.get("/search", response_model=SearchResponse, response_class=NegotiatedResponse)
+def search(
+    q: str,
+    limit: int = 20,
+    include_archived: bool = False,
+    tenant_id: str = Depends(get_tenant),
+    db: Session = Depends(get_db)
+):
+    """Ranked full-text search across client names, notes and addresses and the activity log"""
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="q must not be empty")
+    if limit < 1 or limit > MAX_SEARCH_RESULTS:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_SEARCH_RESULTS}")
+    return full_text_search.search(db, tenant_id, q, limit, include_archived)
+
+# Delta sync endpoints
+def _sync_page(db: Session, model, tenant_id: str, since: Optional[str], limit: int):
+    """One page of a tenant's rows changed after the ``since`` token"""
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    try:
+        position = decode_token(since)
+    except InvalidSyncToken as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    query = db.query(model).filter(model.tenant_id == tenant_id)
+    rows, position, has_more = changed_since(query, model, position, limit, SYNC_SAFETY_LAG_SECONDS)
+    next_token = encode_token(*position) if position else since
+    return rows, next_token, has_more
+
+@app.get("/sync/clients", response_model=SyncClientsResponse, response_class=NegotiatedResponse)
+def sync_clients(
+    since: Optional[str] = None,
+    limit: int = SYNC_PAGE_SIZE,
+    tenant_id: str = Depends(get_tenant),
+    db: Session = Depends(get_db)
+):
+    """Clients changed since a sync token; archived and merged clients come back as tombstones.
+    
+    Omit ``since`` on first install, then pass the returned ``next_token``
+    (repeating while ``has_more`` is true).
+    """
+    rows, next_token, has_more = _sync_page(db, Client, tenant_id, since, limit)
+    return {
+        "changes": [client for client in rows if not client.is_archived],
+        "tombstones": [
+            {
+                "id": client.id,
+                "reason": "merged" if client.merged_into_id else "archived",
+                "merged_into_id": client.merged_into_id,
+                "updated_at": client.updated_at
+            }
+            for client in rows if client.is_archived
+        ],
+        "next_token": next_token,
+        "has_more": has_more
+    }
+
+@app.get("/sync/jobs", response_model=SyncJobsResponse, response_class=NegotiatedResponse)
+def sync_jobs(
+    since: Optional[str] = None,
+    limit: int = SYNC_PAGE_SIZE,
+    tenant_id: str = Depends(get_tenant),
+    db: Session = Depends(get_db)
+):
+    """Jobs changed since a sync token"""
+    rows, next_token, has_more = _sync_page(db, Job, tenant_id, since, limit)
+    return {"changes": rows, "next_token": next_token, "has_more": has_more}
+
+@app.get("/sync/invoices", response_model=SyncInvoicesResponse, response_class=NegotiatedResponse)
+def sync_invoices(
+    since: Optional[str] = None,
+    limit: int = SYNC_PAGE_SIZE,
+    tenant_id: str = Depends(get_tenant),
+    db: Session = Depends(get_db)
+):
+    """Invoices changed since a sync token"""
+    rows, next_token, has_more = _sync_page(db, Invoice, tenant_id, since, limit)
+    return {"changes": rows, "next_token": next_token, "has_more": has_more}
+
+# Invoice endpoints
+def _build_invoices(invoices: List[InvoiceCreate], tenant_id: str, db: Session) -> List[Invoice]:
+    """Allocate missing invoice numbers and validate clients in one pass"""
+    prefix = INVOICE_NUMBER_PREFIXES.get(tenant_id, INVOICE_NUMBER_PREFIX)
+    reserved = [
+        invoice.invoice_number for invoice in invoices
+        if invoice.invoice_number and invoice_numbers.is_reserved(prefix, invoice.invoice_number)
+    ]
+    if reserved:
+        # The allocator would hand these out again later
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invoice numbers starting with '{prefix}-<year>-' are allocated by the server; "
+                   f"omit invoice_number instead of sending: {', '.join(reserved)}"
+        )
+    
+    # Allocate before the session checks out a connection, so a request never
+    # holds two pooled connections at once.
+    needed = sum(1 for invoice in invoices if not invoice.invoice_number)
+    allocated = iter(
+        invoice_numbers.next_numbers(db.get_bind(), tenant_id, prefix, needed) if needed else []
     )
     
-    clients = query.filter(search_filter).limit(50).all()
-    return clients
+    client_ids = {invoice.client_id for invoice in invoices}
+    found_ids = {
+        row.id for row in db.query(Client.id).filter(Client.tenant_id == tenant_id, Client.id.in_(client_ids))
+    }
+    missing_ids = client_ids - found_ids
+    if missing_ids:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Client(s) not found: {', '.join(str(i) for i in sorted(missing_ids))}"
+        )
+    
+    db_invoices = []
+    for invoice in invoices:
+        data = invoice.dict()
+        data["invoice_number"] = invoice.invoice_number or next(allocated)
+        db_invoices.append(Invoice(**data, tenant_id=tenant_id))
+    return db_invoices
+
+# Invoice handlers are plain functions so FastAPI runs them in the threadpool:
+# waiting for a pooled connection must not block the event loop.
+@app.post("/invoices/", response_model=InvoiceResponse, status_code=status.HTTP_201_CREATED)
+def create_invoice(
+    invoice: InvoiceCreate,
+    tenant_id: str = Depends(get_tenant),
+    db: Session = Depends(get_db)
+):
+    """Create an invoice, allocating the invoice number when not supplied"""
+    db_invoice = _build_invoices([invoice], tenant_id, db)[0]
+    try:
+        db.add(db_invoice)
+        db.commit()
+        db.refresh(db_invoice)
+        return db_invoice
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Invoice number already exists")
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/invoices/bulk", response_model=List[InvoiceResponse], status_code=status.HTTP_201_CREATED)
+def create_invoices_bulk(
+    invoices: List[InvoiceCreate],
+    tenant_id: str = Depends(get_tenant),
+    db: Session = Depends(get_db)
+):
+    """Create many invoices in one transaction"""
+    if not invoices:
+        return []
+    if len(invoices) > MAX_BULK_INVOICES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BULK_INVOICES} invoices can be created per request"
+        )
+    
+    db_invoices = _build_invoices(invoices, tenant_id, db)
+    try:
+        db.add_all(db_invoices)
+        db.flush()
+        invoice_ids = [db_invoice.id for db_invoice in db_invoices]
+        db.commit()
+        # Reload all rows (with server-side timestamps) in one query instead of one refresh each
+        db.query(Invoice).filter(Invoice.id.in_(invoice_ids)).all()
+        return db_invoices
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Invoice number already exists")
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/invoices/{invoice_id}", response_model=InvoiceResponse, response_class=NegotiatedResponse)
+def get_invoice(invoice_id: int, tenant_id: str = Depends(get_tenant), db: Session = Depends(get_db)):
+    """Get a specific invoice by ID"""
+    invoice = db.query(Invoice).filter(Invoice.tenant_id == tenant_id, Invoice.id == invoice_id).first()
+    if not invoice:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    return invoice
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=10000, reload=True)
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""Alembic environment: migrates DATABASE_URL, or -x database_url=... when given"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from config import DATABASE_URL
+from models import Base
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Full-text search columns and indexes come from models.py's raw DDL, not the
+# metadata; keep autogenerate from proposing to drop them
+SEARCH_OBJECTS = {"search_vector", "ix_clients_tenant_search_vector", "ix_client_logs_tenant_search_vector"}
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    return not (reflected and compare_to is None and name in SEARCH_OBJECTS)
+
+
+def database_url():
+    url = context.get_x_argument(as_dictionary=True).get("database_url", DATABASE_URL)
+    # Same normalization as main.make_engine
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    if url.startswith("postgresql") and "?sslmode=" not in url:
+        url += "?sslmode=require"
+    return url
+
+
+def run_migrations_offline():
+    context.configure(
+        url=database_url(), target_metadata=target_metadata, literal_binds=True, include_object=include_object
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    engine = create_engine(database_url(), poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection, target_metadata=target_metadata,
+            render_as_batch=True, include_object=include_object,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
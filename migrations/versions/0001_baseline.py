@@ -0,0 +1,111 @@
+"""Baseline: the schema created by the original models (clients, client_logs, services, jobs, invoices)
+
+Databases created by main.py before migrations existed are already at this
+revision. On an empty database (a fresh deploy running ``alembic upgrade head``
+before the app's first start) the original tables are created here, so the
+later revisions apply to them the same way.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def timestamps():
+    return [
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    ]
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("clients"):
+        return
+
+    op.create_table(
+        "clients",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("phone_number", sa.String(20), nullable=False),
+        sa.Column("email", sa.String(255), nullable=True),
+        sa.Column("address", sa.Text(), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("is_archived", sa.Boolean(), nullable=False),
+        *timestamps(),
+    )
+    op.create_index("ix_clients_id", "clients", ["id"])
+    op.create_index("ix_clients_name", "clients", ["name"])
+    op.create_index("ix_clients_phone_number", "clients", ["phone_number"], unique=True)
+    op.create_index("ix_clients_email", "clients", ["email"])
+    op.create_index("ix_clients_is_archived", "clients", ["is_archived"])
+
+    op.create_table(
+        "client_logs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("client_id", sa.Integer(), sa.ForeignKey("clients.id"), nullable=False),
+        sa.Column("action", sa.String(50), nullable=False),
+        sa.Column("details", sa.Text(), nullable=True),
+        sa.Column("performed_by", sa.String(255), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_client_logs_id", "client_logs", ["id"])
+    op.create_index("ix_client_logs_client_id", "client_logs", ["client_id"])
+
+    op.create_table(
+        "services",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("base_price", sa.String(20), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        *timestamps(),
+    )
+    op.create_index("ix_services_id", "services", ["id"])
+
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("client_id", sa.Integer(), sa.ForeignKey("clients.id"), nullable=False),
+        sa.Column("service_id", sa.Integer(), sa.ForeignKey("services.id"), nullable=True),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("status", sa.String(50), nullable=False),
+        sa.Column("price", sa.String(20), nullable=True),
+        sa.Column("scheduled_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("completed_date", sa.DateTime(timezone=True), nullable=True),
+        *timestamps(),
+    )
+    op.create_index("ix_jobs_id", "jobs", ["id"])
+    op.create_index("ix_jobs_client_id", "jobs", ["client_id"])
+    op.create_index("ix_jobs_service_id", "jobs", ["service_id"])
+
+    op.create_table(
+        "invoices",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("client_id", sa.Integer(), sa.ForeignKey("clients.id"), nullable=False),
+        sa.Column("job_id", sa.Integer(), sa.ForeignKey("jobs.id"), nullable=True),
+        sa.Column("invoice_number", sa.String(50), nullable=False),
+        sa.Column("amount", sa.String(20), nullable=False),
+        sa.Column("status", sa.String(50), nullable=False),
+        sa.Column("sent_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("due_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("paid_date", sa.DateTime(timezone=True), nullable=True),
+        *timestamps(),
+    )
+    op.create_index("ix_invoices_id", "invoices", ["id"])
+    op.create_index("ix_invoices_client_id", "invoices", ["client_id"])
+    op.create_index("ix_invoices_job_id", "invoices", ["job_id"])
+    op.create_index("ix_invoices_invoice_number", "invoices", ["invoice_number"], unique=True)
+
+
+def downgrade():
+    # Tables that predate migrations can't be told apart from ones created
+    # here; never drop them
+    pass
@@ -0,0 +1,121 @@
+"""Tenant dimension, merge tracking, invoice number sequences and catalog versions
+
+Adds tenant_id to every tenant-owned table (existing rows belong to
+DEFAULT_TENANT) and replaces the original single-column indexes with
+tenant-leading ones. The old global UNIQUE indexes on phone_number and
+invoice_number are dropped: uniqueness is now per tenant.
+
+Revision ID: 0002_tenant_dimension
+Revises: 0001_baseline
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from config import DEFAULT_TENANT
+
+revision = "0002_tenant_dimension"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+TENANT_TABLES = ("clients", "client_logs", "services", "jobs", "invoices")
+
+# (name, table, columns, unique) as created by the original models
+OLD_INDEXES = [
+    ("ix_clients_name", "clients", ["name"], False),
+    ("ix_clients_phone_number", "clients", ["phone_number"], True),
+    ("ix_clients_email", "clients", ["email"], False),
+    ("ix_clients_is_archived", "clients", ["is_archived"], False),
+    ("ix_client_logs_client_id", "client_logs", ["client_id"], False),
+    ("ix_jobs_client_id", "jobs", ["client_id"], False),
+    ("ix_invoices_client_id", "invoices", ["client_id"], False),
+    ("ix_invoices_invoice_number", "invoices", ["invoice_number"], True),
+]
+
+NEW_INDEXES = [
+    ("ix_clients_tenant_archived_id", "clients", ["tenant_id", "is_archived", "id"]),
+    ("ix_clients_tenant_name", "clients", ["tenant_id", "name"]),
+    ("ix_clients_tenant_email", "clients", ["tenant_id", "email"]),
+    ("ix_clients_tenant_updated_id", "clients", ["tenant_id", "updated_at", "id"]),
+    ("ix_client_logs_tenant_client_created", "client_logs", ["tenant_id", "client_id", "created_at"]),
+    ("ix_services_tenant_active", "services", ["tenant_id", "is_active"]),
+    ("ix_jobs_tenant_client", "jobs", ["tenant_id", "client_id"]),
+    ("ix_jobs_tenant_status", "jobs", ["tenant_id", "status"]),
+    ("ix_jobs_tenant_updated_id", "jobs", ["tenant_id", "updated_at", "id"]),
+    ("ix_invoices_tenant_client", "invoices", ["tenant_id", "client_id"]),
+    ("ix_invoices_tenant_status", "invoices", ["tenant_id", "status"]),
+    ("ix_invoices_tenant_updated_id", "invoices", ["tenant_id", "updated_at", "id"]),
+]
+
+
+def tenant_column():
+    return sa.Column("tenant_id", sa.String(64), nullable=False, server_default=DEFAULT_TENANT)
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if "tenant_id" in {column["name"] for column in inspector.get_columns("clients")}:
+        # Created from scratch by a main.py that already had tenancy
+        return
+
+    for table in TENANT_TABLES:
+        op.add_column(table, tenant_column())
+
+    for name, table, _, _ in OLD_INDEXES:
+        op.drop_index(name, table_name=table)
+
+    with op.batch_alter_table("clients") as batch:
+        batch.add_column(sa.Column("merged_into_id", sa.Integer(), nullable=True))
+        batch.create_foreign_key("clients_merged_into_id_fkey", "clients", ["merged_into_id"], ["id"])
+        batch.create_unique_constraint("uq_clients_tenant_phone_number", ["tenant_id", "phone_number"])
+    with op.batch_alter_table("invoices") as batch:
+        batch.create_unique_constraint("uq_invoices_tenant_invoice_number", ["tenant_id", "invoice_number"])
+
+    for name, table, columns in NEW_INDEXES:
+        op.create_index(name, table, columns)
+
+    # main.py's create_all may already have created these at startup
+    if not inspector.has_table("invoice_number_sequences"):
+        op.create_table(
+            "invoice_number_sequences",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            tenant_column(),
+            sa.Column("prefix", sa.String(20), nullable=False),
+            sa.Column("year", sa.Integer(), nullable=False),
+            sa.Column("next_value", sa.Integer(), nullable=False),
+            sa.UniqueConstraint("tenant_id", "prefix", "year", name="uq_invoice_number_sequences_tenant_prefix_year"),
+        )
+        op.create_index("ix_invoice_number_sequences_id", "invoice_number_sequences", ["id"])
+    if not inspector.has_table("catalog_versions"):
+        op.create_table(
+            "catalog_versions",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            tenant_column(),
+            sa.Column("version", sa.Integer(), nullable=False),
+            sa.UniqueConstraint("tenant_id", name="uq_catalog_versions_tenant"),
+        )
+        op.create_index("ix_catalog_versions_id", "catalog_versions", ["id"])
+
+
+def downgrade():
+    # Fails if two tenants share a phone or invoice number, as it should
+    op.drop_table("catalog_versions")
+    op.drop_table("invoice_number_sequences")
+
+    for name, table, _ in NEW_INDEXES:
+        op.drop_index(name, table_name=table)
+
+    with op.batch_alter_table("invoices") as batch:
+        batch.drop_constraint("uq_invoices_tenant_invoice_number", type_="unique")
+    with op.batch_alter_table("clients") as batch:
+        batch.drop_constraint("uq_clients_tenant_phone_number", type_="unique")
+        batch.drop_constraint("clients_merged_into_id_fkey", type_="foreignkey")
+        batch.drop_column("merged_into_id")
+
+    for name, table, columns, unique in OLD_INDEXES:
+        op.create_index(name, table, columns, unique=unique)
+
+    for table in TENANT_TABLES:
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("tenant_id")
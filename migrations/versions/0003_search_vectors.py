@@ -0,0 +1,54 @@
+"""Full-text search columns and tenant-leading GIN indexes (Postgres only)
+
+Adds the generated search_vector columns that create_all only adds to new
+tables, and indexes them together with tenant_id (needs the btree_gin
+extension). Replaces the search_vector-only GIN indexes of earlier builds.
+
+Revision ID: 0003_search_vectors
+Revises: 0002_tenant_dimension
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0003_search_vectors"
+down_revision = "0002_tenant_dimension"
+branch_labels = None
+depends_on = None
+
+FULL_TEXT_CONFIG = "simple"
+
+SEARCH_VECTORS = {
+    "clients": f"""
+        setweight(to_tsvector('{FULL_TEXT_CONFIG}', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('{FULL_TEXT_CONFIG}', coalesce(notes, '')), 'B') ||
+        setweight(to_tsvector('{FULL_TEXT_CONFIG}', coalesce(address, '')), 'C')
+    """,
+    "client_logs": f"""
+        setweight(to_tsvector('{FULL_TEXT_CONFIG}', coalesce(action, '')), 'B') ||
+        setweight(to_tsvector('{FULL_TEXT_CONFIG}', coalesce(details, '')), 'A')
+    """,
+}
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    for table, expression in SEARCH_VECTORS.items():
+        op.execute(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({expression}) STORED"
+        )
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_search_vector")
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_tenant_search_vector "
+            f"ON {table} USING GIN (tenant_id, search_vector)"
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table in SEARCH_VECTORS:
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_tenant_search_vector")
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
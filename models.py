@@ -1,20 +1,36 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Index, UniqueConstraint, DDL, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
+from config import DEFAULT_TENANT
+
 Base = declarative_base()
 
+# Every tenant-owned table leads its indexes with tenant_id, so a tenant's
+# queries only ever touch that tenant's index range.
+def tenant_column():
+    return Column(String(64), nullable=False, default=DEFAULT_TENANT, server_default=DEFAULT_TENANT)
+
 class Client(Base):
     __tablename__ = "clients"
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "phone_number", name="uq_clients_tenant_phone_number"),
+        Index("ix_clients_tenant_archived_id", "tenant_id", "is_archived", "id"),
+        Index("ix_clients_tenant_name", "tenant_id", "name"),
+        Index("ix_clients_tenant_email", "tenant_id", "email"),
+        Index("ix_clients_tenant_updated_id", "tenant_id", "updated_at", "id"),  # Delta sync order
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(255), nullable=False, index=True)
-    phone_number = Column(String(20), nullable=False, unique=True, index=True)
-    email = Column(String(255), nullable=True, index=True)
+    tenant_id = tenant_column()
+    name = Column(String(255), nullable=False)
+    phone_number = Column(String(20), nullable=False)  # Unique per tenant
+    email = Column(String(255), nullable=True)
     address = Column(Text, nullable=True)
     notes = Column(Text, nullable=True)
-    is_archived = Column(Boolean, default=False, nullable=False, index=True)
+    is_archived = Column(Boolean, default=False, nullable=False)
+    merged_into_id = Column(Integer, ForeignKey("clients.id"), nullable=True)  # Set when archived by a merge
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
@@ -26,9 +42,13 @@ class Client(Base):
 
 class ClientLog(Base):
     __tablename__ = "client_logs"
+    __table_args__ = (
+        Index("ix_client_logs_tenant_client_created", "tenant_id", "client_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    client_id = Column(Integer, ForeignKey("clients.id"), nullable=False, index=True)
+    tenant_id = tenant_column()
+    client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
     action = Column(String(50), nullable=False)  # created, updated, archived, merged, invoice_sent, etc.
     details = Column(Text, nullable=True)  # Additional details about the action
     performed_by = Column(String(255), nullable=False)  # Who performed the action
@@ -43,8 +63,12 @@ class ClientLog(Base):
 # Additional models for future expansion
 class Service(Base):
     __tablename__ = "services"
+    __table_args__ = (
+        Index("ix_services_tenant_active", "tenant_id", "is_active"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
+    tenant_id = tenant_column()
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     base_price = Column(String(20), nullable=True)  # Store as string to handle currency formatting
@@ -57,9 +81,15 @@ class Service(Base):
 
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_tenant_client", "tenant_id", "client_id"),
+        Index("ix_jobs_tenant_status", "tenant_id", "status"),
+        Index("ix_jobs_tenant_updated_id", "tenant_id", "updated_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    client_id = Column(Integer, ForeignKey("clients.id"), nullable=False, index=True)
+    tenant_id = tenant_column()
+    client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
     service_id = Column(Integer, ForeignKey("services.id"), nullable=True, index=True)
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
@@ -79,11 +109,18 @@ class Job(Base):
 
 class Invoice(Base):
     __tablename__ = "invoices"
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "invoice_number", name="uq_invoices_tenant_invoice_number"),
+        Index("ix_invoices_tenant_client", "tenant_id", "client_id"),
+        Index("ix_invoices_tenant_status", "tenant_id", "status"),
+        Index("ix_invoices_tenant_updated_id", "tenant_id", "updated_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    client_id = Column(Integer, ForeignKey("clients.id"), nullable=False, index=True)
+    tenant_id = tenant_column()
+    client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
     job_id = Column(Integer, ForeignKey("jobs.id"), nullable=True, index=True)
-    invoice_number = Column(String(50), nullable=False, unique=True, index=True)
+    invoice_number = Column(String(50), nullable=False)  # Unique per tenant
     amount = Column(String(20), nullable=False)
     status = Column(String(50), default="draft", nullable=False)  # draft, sent, paid, overdue, cancelled
     sent_date = Column(DateTime(timezone=True), nullable=True)
@@ -97,4 +134,56 @@ class Invoice(Base):
     job = relationship("Job")
     
     def __repr__(self):
-        return f"<Invoice(id={self.id}, number='{self.invoice_number}', status='{self.status}')>"
\ No newline at end of file
+        return f"<Invoice(id={self.id}, number='{self.invoice_number}', status='{self.status}')>"
+
+class InvoiceNumberSequence(Base):
+    __tablename__ = "invoice_number_sequences"
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "prefix", "year", name="uq_invoice_number_sequences_tenant_prefix_year"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = tenant_column()
+    prefix = Column(String(20), nullable=False)
+    year = Column(Integer, nullable=False)
+    next_value = Column(Integer, default=1, nullable=False)  # First number not yet reserved by any worker
+    
+    def __repr__(self):
+        return f"<InvoiceNumberSequence(prefix='{self.prefix}', year={self.year}, next_value={self.next_value})>"
+
+class CatalogVersion(Base):
+    __tablename__ = "catalog_versions"
+    __table_args__ = (UniqueConstraint("tenant_id", name="uq_catalog_versions_tenant"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = tenant_column()
+    version = Column(Integer, default=1, nullable=False)  # Bumped with every service write
+    
+    def __repr__(self):
+        return f"<CatalogVersion(tenant_id='{self.tenant_id}', version={self.version})>"
+
+# Full-text search (Postgres only): generated tsvector columns, so Postgres keeps
+# them current on every write path, with GIN indexes that lead with tenant_id like
+# every other index (btree_gin provides GIN support for the tenant_id column).
+# Other databases use the in-process index in search.py instead. Existing
+# databases get these through migrations/versions/0003_search_vectors.py.
+FULL_TEXT_CONFIG = "simple"  # Language-agnostic: no stemming or stop words
+
+event.listen(Client.__table__, "after_create", DDL(f"""
+    ALTER TABLE clients ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{FULL_TEXT_CONFIG}', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('{FULL_TEXT_CONFIG}', coalesce(notes, '')), 'B') ||
+        setweight(to_tsvector('{FULL_TEXT_CONFIG}', coalesce(address, '')), 'C')
+    ) STORED;
+    CREATE EXTENSION IF NOT EXISTS btree_gin;
+    CREATE INDEX ix_clients_tenant_search_vector ON clients USING GIN (tenant_id, search_vector)
+""").execute_if(dialect="postgresql"))
+
+event.listen(ClientLog.__table__, "after_create", DDL(f"""
+    ALTER TABLE client_logs ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{FULL_TEXT_CONFIG}', coalesce(action, '')), 'B') ||
+        setweight(to_tsvector('{FULL_TEXT_CONFIG}', coalesce(details, '')), 'A')
+    ) STORED;
+    CREATE EXTENSION IF NOT EXISTS btree_gin;
+    CREATE INDEX ix_client_logs_tenant_search_vector ON client_logs USING GIN (tenant_id, search_vector)
+""").execute_if(dialect="postgresql"))
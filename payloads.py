@@ -0,0 +1,232 @@
+"""
+Negotiated response formats and compression for metered mobile clients.
+
+Read endpoints answer in JSON or, when the request's ``Accept`` header prefers
+it, MessagePack (optional ``msgpack`` package). Bodies above a size threshold
+are compressed with brotli (optional ``brotli`` package) or gzip according to
+``Accept-Encoding``. Streamed bodies are compressed chunk by chunk and flushed,
+so clients still receive each chunk as soon as it is produced.
+"""
+import contextvars
+import json
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+try:
+    import msgpack
+except ImportError:  # MessagePack is only offered when installed
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # Falls back to gzip
+    brotli = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MSGPACK_ALIASES = (MSGPACK, "application/x-msgpack", "application/vnd.msgpack")
+
+COMPRESSIBLE_TYPES = (JSON, *MSGPACK_ALIASES, "application/x-ndjson", "application/javascript", "application/xml")
+
+_response_format = contextvars.ContextVar("response_format", default=JSON)
+
+
+def available_formats():
+    return (JSON, MSGPACK) if msgpack else (JSON,)
+
+
+def response_format():
+    """Media type negotiated for the current request"""
+    return _response_format.get()
+
+
+def _qualities(header):
+    """Parse an Accept-style header into {token: q}"""
+    qualities = {}
+    for part in (header or "").split(","):
+        token, *params = [p.strip() for p in part.split(";")]
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[token.lower()] = max(q, qualities.get(token.lower(), 0.0))
+    return qualities
+
+
+def negotiate_format(accept):
+    """MessagePack when explicitly accepted at least as strongly as JSON, else JSON"""
+    if not msgpack:
+        return JSON
+    qualities = _qualities(accept)
+    msgpack_q = max(qualities.get(alias, 0.0) for alias in MSGPACK_ALIASES)
+    json_q = qualities.get(JSON, qualities.get("application/*", qualities.get("*/*", 0.0 if accept else 1.0)))
+    return MSGPACK if msgpack_q > 0 and msgpack_q >= json_q else JSON
+
+
+def negotiate_encoding(accept_encoding):
+    """Best supported content coding for an Accept-Encoding header (None = identity)"""
+    qualities = _qualities(accept_encoding)
+    candidates = ("br", "gzip") if brotli else ("gzip",)
+    best, best_q = None, 0.0
+    for encoding in candidates:
+        q = qualities.get(encoding, qualities.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def encode(data, media_type=JSON):
+    """Serialize already JSON-compatible data in the given format"""
+    if media_type == MSGPACK:
+        return msgpack.packb(data, use_bin_type=True)
+    # Same settings as Starlette's JSONResponse
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+class NegotiatedResponse(JSONResponse):
+    """JSON response that switches to MessagePack when the request negotiated it"""
+
+    def __init__(self, content, *args, **kwargs):
+        self.media_type = response_format()
+        super().__init__(content, *args, **kwargs)
+        self.headers.add_vary_header("Accept")
+
+    def render(self, content):
+        return encode(content, self.media_type)
+
+
+class ContentNegotiationMiddleware:
+    """Record the response format the request's Accept header asks for"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _response_format.set(negotiate_format(Headers(scope=scope).get("accept")))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _response_format.reset(token)
+
+
+class _GzipStream:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data, final):
+        flush_mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return self._compressor.compress(data) + self._compressor.flush(flush_mode)
+
+
+class _BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data, final):
+        output = self._compressor.process(data)
+        return output + (self._compressor.finish() if final else self._compressor.flush())
+
+
+def compressor(encoding, gzip_level=6, brotli_quality=5):
+    """Incremental compressor; ``compress(data, final)`` returns bytes ready to send"""
+    if encoding == "br":
+        return _BrotliStream(brotli_quality)
+    return _GzipStream(gzip_level)
+
+
+def is_compressible(content_type):
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return media_type.startswith("text/") or media_type.endswith("+json") or media_type in COMPRESSIBLE_TYPES
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing large and streamed responses with brotli or gzip"""
+
+    def __init__(self, app, minimum_size=1024, gzip_level=6, brotli_quality=5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        encoding = None
+        if scope["type"] == "http":
+            encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(send, encoding, self)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, send, encoding, settings):
+        self._send = send
+        self.encoding = encoding
+        self.settings = settings
+        self.start = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk shows whether to compress
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start is not None:
+            start, self.start = self.start, None
+            headers = MutableHeaders(raw=start["headers"])
+            self.passthrough = (
+                "content-encoding" in headers
+                or start["status"] in (204, 304)
+                or not is_compressible(headers.get("content-type"))
+                or (not more_body and len(body) < self.settings.minimum_size)
+            )
+            if self.passthrough:
+                await self._send(start)
+                await self._send(message)
+                return
+
+            self.compressor = compressor(self.encoding, self.settings.gzip_level, self.settings.brotli_quality)
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # The compressed bytes differ from the identity representation
+                headers["ETag"] = f"W/{etag}"
+            compressed = self.compressor.compress(body, final=not more_body)
+            if more_body:
+                # Streaming: the compressed length is unknown up front
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(compressed))
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+            return
+
+        if self.passthrough:
+            await self._send(message)
+            return
+        if body or not more_body:
+            await self._send({
+                "type": "http.response.body",
+                "body": self.compressor.compress(body, final=not more_body),
+                "more_body": more_body,
+            })
@@ -3,6 +3,8 @@ from typing import Optional, List
 from datetime import datetime
 import re
 
+from config import MAX_BULK_CLIENT_IDS
+
 # Client schemas
 class ClientBase(BaseModel):
     name: str
@@ -87,6 +89,92 @@ class MergeClientsRequest(BaseModel):
             raise ValueError('Primary and secondary client IDs must be different')
         return v
 
+# Bulk client operation schemas
+class ClientFilter(BaseModel):
+    q: Optional[str] = None  # Same matching as /clients/search/
+    updated_before: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    
+    @validator('q')
+    def validate_q(cls, v):
+        if v is not None and not v.strip():
+            raise ValueError('q must not be empty')
+        return v.strip() if v else v
+    
+    @validator('created_before', always=True)
+    def validate_criteria(cls, v, values):
+        # An empty filter would select every client in the tenant
+        if v is None and values.get('q') is None and values.get('updated_before') is None:
+            raise ValueError('A filter needs at least one of q, updated_before, created_before')
+        return v
+
+class BulkClientSelection(BaseModel):
+    client_ids: Optional[List[int]] = None
+    filter: Optional[ClientFilter] = None
+    
+    @validator('client_ids')
+    def validate_client_ids(cls, v):
+        if v is not None and len(v) > MAX_BULK_CLIENT_IDS:
+            raise ValueError(f'At most {MAX_BULK_CLIENT_IDS} client_ids can be given per request')
+        return v
+    
+    @validator('filter', always=True)
+    def validate_selection(cls, v, values):
+        if not values.get('client_ids') and v is None:
+            raise ValueError('Provide client_ids, a filter, or both')
+        return v
+
+class BulkArchiveRequest(BulkClientSelection):
+    pass
+
+class BulkUpdateRequest(BulkClientSelection):
+    include_archived: bool = False
+    changes: ClientUpdate
+    
+    @validator('changes')
+    def validate_changes(cls, v):
+        changes = v.dict(exclude_unset=True)
+        if not changes:
+            raise ValueError('At least one field must be changed')
+        if 'phone_number' in changes:
+            raise ValueError('Phone numbers are unique and cannot be bulk updated')
+        if 'name' in changes and changes['name'] is None:
+            raise ValueError('name cannot be null')
+        return v
+
+class BulkOperationResponse(BaseModel):
+    message: str
+    count: int
+    client_ids: List[int]
+
+# Full-text search schemas
+class ClientSearchHit(BaseModel):
+    id: int
+    name: str
+    phone_number: str
+    is_archived: bool
+    rank: float
+    snippet: str
+
+class ClientLogSearchHit(BaseModel):
+    id: int
+    client_id: int
+    action: str
+    created_at: datetime
+    rank: float
+    snippet: str
+
+class SearchResponse(BaseModel):
+    clients: List[ClientSearchHit]
+    logs: List[ClientLogSearchHit]
+
+# Delta sync schemas
+class SyncTombstone(BaseModel):
+    id: int
+    reason: str  # archived, merged
+    merged_into_id: Optional[int] = None
+    updated_at: datetime
+
 # Service schemas (for future use)
 class ServiceBase(BaseModel):
     name: str
@@ -96,6 +184,19 @@ class ServiceBase(BaseModel):
 class ServiceCreate(ServiceBase):
     pass
 
+class ServiceUpdate(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+    base_price: Optional[str] = None
+    is_active: Optional[bool] = None
+    
+    @validator('name', 'is_active')
+    def validate_not_null(cls, v):
+        # Omit the field to leave it unchanged; the columns are NOT NULL
+        if v is None:
+            raise ValueError('Field cannot be null')
+        return v
+
 class ServiceResponse(ServiceBase):
     id: int
     is_active: bool
@@ -144,7 +245,7 @@ class InvoiceBase(BaseModel):
 class InvoiceCreate(InvoiceBase):
     client_id: int
     job_id: Optional[int] = None
-    invoice_number: str
+    invoice_number: Optional[str] = None  # Allocated by the server when omitted
 
 class InvoiceUpdate(BaseModel):
     amount: Optional[str] = None
@@ -166,6 +267,22 @@ class InvoiceResponse(InvoiceBase):
     class Config:
         from_attributes = True
 
+class SyncClientsResponse(BaseModel):
+    changes: List[ClientResponse]
+    tombstones: List[SyncTombstone]
+    next_token: Optional[str] = None
+    has_more: bool
+
+class SyncJobsResponse(BaseModel):
+    changes: List[JobResponse]
+    next_token: Optional[str] = None
+    has_more: bool
+
+class SyncInvoicesResponse(BaseModel):
+    changes: List[InvoiceResponse]
+    next_token: Optional[str] = None
+    has_more: bool
+
 # Response models for API operations
 class MessageResponse(BaseModel):
     message: str
@@ -0,0 +1,226 @@
+"""
+Full-text search over client names/notes/addresses and the client activity log.
+
+On Postgres this uses the generated ``search_vector`` columns and their
+tenant-leading GIN indexes (see models.py). Matches are capped at a candidate
+limit before ranking, so a very common term costs the same as a rare one; the
+ranking is then approximate, since the best matches may lie outside the
+candidates the index happened to return first. Other databases (SQLite in
+development) fall back to an in-process inverted index that is brought up to
+date incrementally before each search.
+
+Snippets are HTML: user text is escaped and matches are wrapped in <b></b>.
+"""
+import html
+import math
+import re
+import threading
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import text
+
+from models import Client, ClientLog, FULL_TEXT_CONFIG
+from sync import updated_at_key
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+# Matches are marked with control characters, then the text is escaped and the marks become <b></b>
+HIGHLIGHT_START, HIGHLIGHT_STOP = "\x02", "\x03"
+HEADLINE_OPTIONS = f"MaxFragments=2, MaxWords=15, MinWords=5, StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}"
+
+CLIENTS_SQL = f"""
+WITH query AS (SELECT websearch_to_tsquery('{FULL_TEXT_CONFIG}', :q) AS tsq),
+matches AS (
+    SELECT c.id, ts_rank_cd(c.search_vector, query.tsq) AS rank
+    FROM clients c, query
+    WHERE c.tenant_id = :tenant_id AND c.search_vector @@ query.tsq
+      AND (:include_archived OR NOT c.is_archived)
+    LIMIT :candidates  -- Unordered: for common terms only these candidates are ranked
+),
+top AS (SELECT id, rank FROM matches ORDER BY rank DESC, id LIMIT :limit)
+SELECT c.id, c.name, c.phone_number, c.is_archived, top.rank,
+       ts_headline('{FULL_TEXT_CONFIG}', translate(concat_ws(' ', c.name, c.notes, c.address), :marks, ''),
+                   query.tsq, :headline_options) AS snippet
+FROM top JOIN clients c ON c.id = top.id, query
+ORDER BY top.rank DESC, c.id
+"""
+
+LOGS_SQL = f"""
+WITH query AS (SELECT websearch_to_tsquery('{FULL_TEXT_CONFIG}', :q) AS tsq),
+matches AS (
+    SELECT l.id, ts_rank_cd(l.search_vector, query.tsq) AS rank
+    FROM client_logs l, query
+    WHERE l.tenant_id = :tenant_id AND l.search_vector @@ query.tsq
+    LIMIT :candidates  -- Unordered: for common terms only these candidates are ranked
+),
+top AS (SELECT id, rank FROM matches ORDER BY rank DESC, id DESC LIMIT :limit)
+SELECT l.id, l.client_id, l.action, l.created_at, top.rank,
+       ts_headline('{FULL_TEXT_CONFIG}', translate(concat_ws(' ', l.action, l.details), :marks, ''),
+                   query.tsq, :headline_options) AS snippet
+FROM top JOIN client_logs l ON l.id = top.id, query
+ORDER BY top.rank DESC, l.id DESC
+"""
+
+
+def tokenize(value):
+    return TOKEN_PATTERN.findall((value or "").lower())
+
+
+def render_highlights(marked):
+    """HTML-escape text whose matches are wrapped in highlight marks, then turn the marks into <b></b>"""
+    return html.escape(marked).replace(HIGHLIGHT_START, "<b>").replace(HIGHLIGHT_STOP, "</b>")
+
+
+def make_snippet(value, terms, width=80):
+    """Short HTML excerpt around the first matching term, with matches wrapped in <b></b>"""
+    value = (value or "").replace(HIGHLIGHT_START, "").replace(HIGHLIGHT_STOP, "")
+    lowered = value.lower()
+    positions = [m.start() for term in terms for m in re.finditer(rf"\b{re.escape(term)}\b", lowered)]
+    start = max(0, min(positions) - width // 3) if positions else 0
+    excerpt = value[start:start + width]
+    for term in terms:
+        excerpt = re.sub(
+            rf"\b({re.escape(term)})\b", rf"{HIGHLIGHT_START}\1{HIGHLIGHT_STOP}", excerpt, flags=re.IGNORECASE
+        )
+    return ("…" if start else "") + render_highlights(excerpt) + ("…" if start + width < len(value) else "")
+
+
+class InvertedIndex:
+    """Term -> document postings with tf-idf ranking and all-terms matching"""
+
+    def __init__(self):
+        self.postings = {}
+        self.documents = {}
+
+    def put(self, key, content, payload):
+        self.remove(key)
+        counts = Counter(tokenize(content))
+        for term, frequency in counts.items():
+            self.postings.setdefault(term, {})[key] = frequency
+        self.documents[key] = (counts, content, payload)
+
+    def remove(self, key):
+        document = self.documents.pop(key, None)
+        if document:
+            for term in document[0]:
+                postings = self.postings.get(term)
+                postings.pop(key, None)
+                if not postings:
+                    del self.postings[term]
+
+    def search(self, terms, limit, accept=lambda payload: True):
+        if not terms:
+            return []
+        # Intersect starting from the rarest term
+        postings = sorted((self.postings.get(term, {}) for term in set(terms)), key=len)
+        keys = set(postings[0]).intersection(*postings[1:]) if postings[0] else set()
+        total = len(self.documents)
+        scored = []
+        for key in keys:
+            counts, content, payload = self.documents[key]
+            if not accept(payload):
+                continue
+            score = sum(
+                (1 + math.log(counts[term])) * math.log(1 + total / len(self.postings[term]))
+                for term in set(terms)
+            )
+            scored.append((score, key))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(score, self.documents[key][1], self.documents[key][2]) for score, key in scored[:limit]]
+
+
+class _TenantIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clients = InvertedIndex()
+        self.logs = InvertedIndex()
+        self.clients_updated_at = None
+        self.logs_last_id = 0
+
+
+class FullTextSearch:
+    """Ranked search across clients and client logs for one tenant"""
+
+    def __init__(self, candidate_limit=1000):
+        self.candidate_limit = candidate_limit
+        self._lock = threading.Lock()
+        self._fallback = {}  # (engine, tenant) -> _TenantIndex
+
+    def search(self, db, tenant_id, q, limit, include_archived=False):
+        if db.get_bind().dialect.name == "postgresql":
+            return self._search_postgres(db, tenant_id, q, limit, include_archived)
+        return self._search_fallback(db, tenant_id, q, limit, include_archived)
+
+    def _search_postgres(self, db, tenant_id, q, limit, include_archived):
+        params = {
+            "q": q, "tenant_id": tenant_id, "limit": limit,
+            "candidates": self.candidate_limit, "include_archived": include_archived,
+            "headline_options": HEADLINE_OPTIONS, "marks": HIGHLIGHT_START + HIGHLIGHT_STOP
+        }
+        clients = db.execute(text(CLIENTS_SQL), params).mappings().all()
+        logs = db.execute(text(LOGS_SQL), params).mappings().all()
+        return {
+            "clients": [{**row, "snippet": render_highlights(row["snippet"])} for row in clients],
+            "logs": [{**row, "snippet": render_highlights(row["snippet"])} for row in logs],
+        }
+
+    def _search_fallback(self, db, tenant_id, q, limit, include_archived):
+        with self._lock:
+            index = self._fallback.setdefault((db.get_bind(), tenant_id), _TenantIndex())
+        terms = tokenize(q)
+        with index.lock:
+            self._refresh(db, tenant_id, index)
+            clients = index.clients.search(
+                terms, limit, accept=lambda payload: include_archived or not payload["is_archived"]
+            )
+            logs = index.logs.search(terms, limit)
+        return {
+            "clients": [
+                {**payload, "rank": score, "snippet": make_snippet(content, terms)}
+                for score, content, payload in clients
+            ],
+            "logs": [
+                {**payload, "rank": score, "snippet": make_snippet(content, terms)}
+                for score, content, payload in logs
+            ],
+        }
+
+    @staticmethod
+    def _refresh(db, tenant_id, index):
+        """Pull clients changed since the last refresh and logs appended since then"""
+        query = db.query(Client).filter(Client.tenant_id == tenant_id)
+        # Compared the way the database orders it (normalized text on SQLite)
+        updated_at, to_key = updated_at_key(query, Client)
+        query = query.add_columns(updated_at)
+        if index.clients_updated_at is not None:
+            # now() defaults can have whole-second precision, so a row written after the
+            # watermark may be stamped earlier within the same second: rescan that second
+            watermark = index.clients_updated_at.replace(microsecond=0)
+            query = query.filter(updated_at >= to_key(watermark))
+        for client, client_updated_at in query.order_by(updated_at):
+            index.clients.put(
+                client.id,
+                " ".join(filter(None, [client.name, client.notes, client.address])),
+                {
+                    "id": client.id,
+                    "name": client.name,
+                    "phone_number": client.phone_number,
+                    "is_archived": client.is_archived,
+                }
+            )
+            index.clients_updated_at = (
+                client_updated_at if isinstance(client_updated_at, datetime)
+                else datetime.fromisoformat(client_updated_at)
+            )
+
+        logs = db.query(ClientLog).filter(
+            ClientLog.tenant_id == tenant_id,
+            ClientLog.id > index.logs_last_id
+        ).order_by(ClientLog.id)
+        for log in logs:
+            index.logs.put(
+                log.id,
+                " ".join(filter(None, [log.action, log.details])),
+                {"id": log.id, "client_id": log.client_id, "action": log.action, "created_at": log.created_at}
+            )
+            index.logs_last_id = log.id
@@ -0,0 +1,97 @@
+"""
+Multi-tenant support: tenant resolution and per-tenant connection routing.
+
+With ``API_KEYS`` configured, each request must present a known ``X-API-Key``
+and its tenant is the one the key belongs to. Without it, the tenant is taken
+from the ``X-Tenant-ID`` header as given (falling back to the default tenant):
+that is routing only, not isolation, since any caller can name any tenant.
+
+Tenants share the main database unless they are listed in
+``TENANT_DATABASE_URLS``, in which case their sessions are routed to a
+dedicated database so a large tenant never competes with the others.
+"""
+import re
+import threading
+
+from sqlalchemy.orm import sessionmaker
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+TENANT_HEADER = "X-Tenant-ID"
+API_KEY_HEADER = "X-API-Key"
+PUBLIC_PATHS = {"/", "/health", "/docs", "/openapi.json"}  # Served without an API key
+TENANT_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+
+class TenantMiddleware:
+    """ASGI middleware that resolves the tenant into ``request.state.tenant_id``.
+
+    A verified API key is recorded in ``request.state.api_key`` (None otherwise).
+    """
+
+    def __init__(self, app, default_tenant, api_keys=None):
+        self.app = app
+        self.default_tenant = default_tenant
+        self.api_keys = dict(api_keys or {})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        requested = headers.get(TENANT_HEADER)
+        api_key = None
+        if self.api_keys and scope["path"] not in PUBLIC_PATHS:
+            api_key = headers.get(API_KEY_HEADER)
+            if api_key not in self.api_keys:
+                await self._reject(scope, receive, send, 401, f"Missing or unknown {API_KEY_HEADER}")
+                return
+            tenant_id = self.api_keys[api_key]
+            if requested is not None and requested.strip().lower() != tenant_id:
+                await self._reject(scope, receive, send, 403, f"{API_KEY_HEADER} does not belong to this tenant")
+                return
+        else:
+            tenant_id = (requested or self.default_tenant).strip().lower()
+            if not TENANT_PATTERN.match(tenant_id):
+                await self._reject(scope, receive, send, 400, f"Invalid {TENANT_HEADER} header")
+                return
+
+        state = scope.setdefault("state", {})
+        state["tenant_id"] = tenant_id
+        state["api_key"] = api_key
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _reject(scope, receive, send, status_code, detail):
+        response = JSONResponse(status_code=status_code, content={"detail": detail})
+        await response(scope, receive, send)
+
+
+class TenantRouter:
+    """Maps tenants to engines; unlisted tenants use the default engine"""
+
+    def __init__(self, default_engine, tenant_urls, engine_factory, metadata):
+        self.default_engine = default_engine
+        self.tenant_urls = dict(tenant_urls)
+        self.engine_factory = engine_factory
+        self.metadata = metadata
+        self._lock = threading.Lock()
+        self._engines = {}
+        self._sessionmakers = {default_engine: sessionmaker(autocommit=False, autoflush=False, bind=default_engine)}
+
+    def engine_for(self, tenant_id):
+        url = self.tenant_urls.get(tenant_id)
+        if not url:
+            return self.default_engine
+        with self._lock:
+            engine = self._engines.get(url)
+            if engine is None:
+                engine = self.engine_factory(url)
+                self.metadata.create_all(bind=engine)
+                self._engines[url] = engine
+                self._sessionmakers[engine] = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+            return engine
+
+    def session_for(self, tenant_id):
+        return self._sessionmakers[self.engine_for(tenant_id)]()
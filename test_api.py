@@ -4,9 +4,12 @@ Run this after starting your server to ensure everything works correctly.
 """
 import requests
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 BASE_URL = "http://localhost:10000"
+RATE_LIMIT_REFILL_SECONDS = 5  # Server's RATE_LIMIT_BURST / RATE_LIMIT_PER_SECOND
 
 def print_section(title):
     """Print a formatted section header"""
@@ -106,6 +109,45 @@ def test_get_clients():
         print(f"❌ FAIL Get clients: {e}")
         return []
 
+def test_sparse_fieldsets():
+    """Test projecting only some client fields"""
+    try:
+        response = requests.get(f"{BASE_URL}/clients/", params={"fields": "id,name,phone_number"})
+        print_result("Get clients with fields", response.status_code)
+        
+        if response.status_code == 200:
+            clients = response.json()
+            trimmed = all(set(c) == {"id", "name", "phone_number"} for c in clients)
+            print(f"   Only requested fields returned: {trimmed}")
+        
+        response = requests.get(f"{BASE_URL}/clients/", params={"fields": "id,not_a_field"})
+        print_result("Get clients with unknown field (should fail)", response.status_code, 400)
+            
+    except Exception as e:
+        print(f"❌ FAIL Sparse fieldsets: {e}")
+
+def test_client_counts():
+    """Test list totals and faceted counts"""
+    try:
+        response = requests.get(f"{BASE_URL}/clients/", params={"include_total": "true", "limit": 1})
+        print_result("Get clients with total", response.status_code)
+        
+        if response.status_code == 200:
+            print(f"   X-Total-Count: {response.headers.get('X-Total-Count')} "
+                  f"(estimated: {response.headers.get('X-Total-Count-Estimated')})")
+        
+        response = requests.get(f"{BASE_URL}/clients/counts")
+        print_result("Get client counts", response.status_code)
+        
+        if response.status_code == 200:
+            counts = response.json()
+            print(f"   Clients: {counts['clients']}")
+            print(f"   Jobs: {counts['jobs']}")
+            print(f"   Invoices: {counts['invoices']}")
+            
+    except Exception as e:
+        print(f"❌ FAIL Client counts: {e}")
+
 def test_update_client(client_id):
     """Test updating a client"""
     if not client_id:
@@ -144,6 +186,20 @@ def test_search_clients():
                 
         except Exception as e:
             print(f"❌ FAIL Search '{query}': {e}")
+    
+    # Full-text search over notes and the activity log
+    try:
+        response = requests.get(f"{BASE_URL}/search", params={"q": "test client"})
+        print_result("Full-text search 'test client'", response.status_code)
+        
+        if response.status_code == 200:
+            results = response.json()
+            print(f"   Found {len(results['clients'])} clients and {len(results['logs'])} log entries")
+            for hit in results["clients"][:3]:
+                print(f"   - {hit['name']}: {hit['snippet']}")
+                
+    except Exception as e:
+        print(f"❌ FAIL Full-text search: {e}")
 
 def test_client_history(client_id):
     """Test getting client history"""
@@ -194,6 +250,239 @@ def test_resend_features(client_id):
     except Exception as e:
         print(f"❌ FAIL Resend job summary: {e}")
 
+def test_concurrent_invoice_creation(client_id, workers=20, invoices_per_worker=10):
+    """Create invoices from many parallel sessions; every number must be unique on the first try"""
+    print_section("INVOICE NUMBERING TESTS")
+    
+    if not client_id:
+        print("❌ SKIP Concurrent invoices: No client ID provided")
+        return
+    
+    def create_invoices(worker):
+        session = requests.Session()
+        results = []
+        for _ in range(invoices_per_worker):
+            response = session.post(f"{BASE_URL}/invoices/", json={"client_id": client_id, "amount": "10.00"})
+            while response.status_code == 429:
+                # All workers share this machine's rate limit; back off as a real client would
+                time.sleep(int(response.headers.get("Retry-After", "1")))
+                response = session.post(f"{BASE_URL}/invoices/", json={"client_id": client_id, "amount": "10.00"})
+            results.append((response.status_code, response.json().get("invoice_number")))
+        return results
+    
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = [r for batch in executor.map(create_invoices, range(workers)) for r in batch]
+        
+        failures = [code for code, _ in results if code != 201]
+        numbers = [number for code, number in results if code == 201]
+        print_result(f"Create {len(results)} invoices in parallel", 201 if not failures else failures[0], 201)
+        duplicates = len(numbers) - len(set(numbers))
+        print_result("Invoice numbers unique", 0 if not duplicates else duplicates, 0)
+        
+        response = requests.post(
+            f"{BASE_URL}/invoices/bulk",
+            json=[{"client_id": client_id, "amount": "5.00"} for _ in range(25)]
+        )
+        print_result("Bulk create invoices", response.status_code, 201)
+        if response.status_code == 201:
+            print(f"   Allocated {response.json()[0]['invoice_number']} .. {response.json()[-1]['invoice_number']}")
+
+        # Let the bucket refill so the remaining tests are not rejected
+        time.sleep(RATE_LIMIT_REFILL_SECONDS)
+
+        response = requests.post(
+            f"{BASE_URL}/invoices/",
+            json={"client_id": client_id, "amount": "10.00", "invoice_number": numbers[0] if numbers else "INV-2026-000001"}
+        )
+        print_result("Supplied number in the allocated range (should fail)", response.status_code, 400)
+
+        legacy_number = f"LEGACY-{int(time.time())}"
+        for expected in (201, 409):
+            response = requests.post(
+                f"{BASE_URL}/invoices/",
+                json={"client_id": client_id, "amount": "10.00", "invoice_number": legacy_number}
+            )
+            print_result(f"Supplied number {legacy_number}", response.status_code, expected)
+            
+    except Exception as e:
+        print(f"❌ FAIL Concurrent invoices: {e}")
+
+def test_bulk_operations():
+    """Test bulk update and bulk archive"""
+    print_section("BULK OPERATION TESTS")
+    
+    client_ids = []
+    for i in range(3):
+        response = requests.post(f"{BASE_URL}/clients/", json={
+            "name": f"Bulk Test {i}",
+            "phone_number": f"+35193000000{i}"
+        })
+        if response.status_code == 201:
+            client_ids.append(response.json()["id"])
+    
+    try:
+        response = requests.patch(f"{BASE_URL}/clients/bulk", json={
+            "client_ids": client_ids,
+            "changes": {"notes": "Updated in bulk"}
+        })
+        print_result("Bulk update clients", response.status_code)
+        if response.status_code == 200:
+            print(f"   Updated {response.json()['count']} clients")
+        
+        response = requests.patch(f"{BASE_URL}/clients/bulk", json={
+            "client_ids": client_ids,
+            "changes": {"phone_number": "+351930000999"}
+        })
+        print_result("Bulk update phone numbers (should fail)", response.status_code, 422)
+        
+        response = requests.post(f"{BASE_URL}/clients/bulk-archive", json={"filter": {"q": "Bulk Test"}})
+        print_result("Bulk archive clients", response.status_code)
+        if response.status_code == 200:
+            print(f"   Archived {response.json()['count']} clients")
+            
+    except Exception as e:
+        print(f"❌ FAIL Bulk operations: {e}")
+
+def test_tenant_isolation():
+    """Test that tenants only see their own clients"""
+    print_section("TENANT ISOLATION TESTS")
+    
+    tenant_a = {"X-Tenant-ID": "api-test-a"}
+    tenant_b = {"X-Tenant-ID": "api-test-b"}
+    client_data = {"name": "Tenant Test", "phone_number": "+351940000001"}
+    
+    try:
+        response = requests.post(f"{BASE_URL}/clients/", json=client_data, headers=tenant_a)
+        print_result("Create client in tenant A", response.status_code, 201)
+        client_id = response.json().get("id") if response.status_code == 201 else None
+        
+        # Phone numbers are only unique within a tenant
+        response = requests.post(f"{BASE_URL}/clients/", json=client_data, headers=tenant_b)
+        print_result("Create same phone in tenant B", response.status_code, 201)
+        
+        if client_id:
+            response = requests.get(f"{BASE_URL}/clients/{client_id}", headers=tenant_b)
+            print_result("Read tenant A client from tenant B (should fail)", response.status_code, 404)
+        
+        response = requests.get(f"{BASE_URL}/clients/", headers={"X-Tenant-ID": "not a tenant!"})
+        print_result("Invalid tenant header (should fail)", response.status_code, 400)
+            
+    except Exception as e:
+        print(f"❌ FAIL Tenant isolation: {e}")
+
+def test_delta_sync():
+    """Test paging through client changes with sync tokens"""
+    print_section("DELTA SYNC TESTS")
+    
+    try:
+        response = requests.get(f"{BASE_URL}/sync/clients", params={"limit": 50})
+        print_result("Initial client sync", response.status_code)
+        
+        pages = 1
+        data = response.json() if response.status_code == 200 else {}
+        while data.get("has_more"):
+            response = requests.get(f"{BASE_URL}/sync/clients", params={"limit": 50, "since": data["next_token"]})
+            data = response.json()
+            pages += 1
+        print(f"   Full sync took {pages} page(s)")
+        
+        # Nothing changed since the last token
+        response = requests.get(f"{BASE_URL}/sync/clients", params={"since": data.get("next_token")})
+        print_result("Incremental client sync", response.status_code)
+        if response.status_code == 200:
+            print(f"   {len(response.json()['changes'])} changes, {len(response.json()['tombstones'])} tombstones")
+        
+        response = requests.get(f"{BASE_URL}/sync/clients", params={"since": "not-a-token"})
+        print_result("Sync with invalid token (should fail)", response.status_code, 400)
+        
+        for resource in ["jobs", "invoices"]:
+            response = requests.get(f"{BASE_URL}/sync/{resource}")
+            print_result(f"Initial {resource} sync", response.status_code)
+            
+    except Exception as e:
+        print(f"❌ FAIL Delta sync: {e}")
+
+def test_admission_control():
+    """Test that bursts past the rate limit are rejected quickly with Retry-After"""
+    print_section("ADMISSION CONTROL TESTS")
+    
+    def burst_request(i):
+        # Unverified keys must not get a bucket of their own
+        return requests.get(f"{BASE_URL}/clients/", params={"limit": 1}, headers={"X-API-Key": f"api-test-burst-{i}"})
+    
+    try:
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            statuses = list(executor.map(burst_request, range(150)))
+        rejected = [r for r in statuses if r.status_code == 429]
+        print_result("Burst past rate limit is rejected", 429 if rejected else statuses[-1].status_code, 429)
+        if rejected:
+            print(f"   {len(rejected)} of {len(statuses)} rejected, Retry-After: {rejected[0].headers.get('Retry-After')}s")
+        
+        response = requests.get(f"{BASE_URL}/health")
+        print_result("Health check is never rate limited", response.status_code)
+        
+        # Let the bucket refill so the remaining tests are not rejected
+        time.sleep(RATE_LIMIT_REFILL_SECONDS)
+            
+    except Exception as e:
+        print(f"❌ FAIL Admission control: {e}")
+
+def test_service_catalog():
+    """Test the cached service catalog and its ETag"""
+    print_section("SERVICE CATALOG TESTS")
+    
+    try:
+        response = requests.post(f"{BASE_URL}/services", json={
+            "name": "Boiler service",
+            "description": "Annual boiler inspection",
+            "base_price": "80.00"
+        })
+        print_result("Create service", response.status_code, 201)
+        
+        if response.status_code == 201:
+            service_id = response.json()["id"]
+            response = requests.put(f"{BASE_URL}/services/{service_id}", json={"name": None})
+            print_result("Update service with null name (should fail)", response.status_code, 422)
+        
+        response = requests.get(f"{BASE_URL}/services")
+        print_result("Get services", response.status_code)
+        etag = response.headers.get("ETag")
+        if response.status_code == 200:
+            print(f"   {len(response.json())} services, ETag: {etag}")
+        
+        response = requests.get(f"{BASE_URL}/services", headers={"If-None-Match": etag})
+        print_result("Get unchanged services", response.status_code, 304)
+            
+    except Exception as e:
+        print(f"❌ FAIL Service catalog: {e}")
+
+def test_payload_formats():
+    """Test MessagePack negotiation and response compression"""
+    print_section("PAYLOAD FORMAT TESTS")
+    
+    try:
+        response = requests.get(f"{BASE_URL}/clients/", params={"limit": 200}, headers={"Accept-Encoding": "gzip"})
+        print_result("Get clients (gzip)", response.status_code)
+        encoding = response.headers.get("Content-Encoding", "identity")
+        print(f"   Content-Encoding: {encoding}, {len(response.content)} bytes decoded")
+        
+        response = requests.get(f"{BASE_URL}/clients/", params={"limit": 200}, headers={"Accept": "application/msgpack"})
+        print_result("Get clients (MessagePack)", response.status_code)
+        content_type = response.headers.get("Content-Type")
+        if content_type == "application/msgpack":
+            print(f"   MessagePack body: {len(response.content)} bytes")
+        else:
+            print(f"   Server answered {content_type} (msgpack not installed on the server)")
+        
+        response = requests.get(f"{BASE_URL}/clients/", params={"limit": 200}, headers={"Accept": "application/json"})
+        print_result("Get clients (JSON)", response.status_code)
+        if response.headers.get("Content-Type") != "application/json":
+            print(f"❌ FAIL Expected JSON, got {response.headers.get('Content-Type')}")
+            
+    except Exception as e:
+        print(f"❌ FAIL Payload formats: {e}")
+
 def test_archive_client(client_id):
     """Test archiving a client"""
     print_section("ARCHIVE TEST")
@@ -227,12 +516,21 @@ def main():
         client_id = test_create_client()
         test_duplicate_client()
         test_get_clients()
+        test_sparse_fieldsets()
+        test_client_counts()
         test_update_client(client_id)
         
         # Advanced feature tests
         test_search_clients()
         test_client_history(client_id)
         test_resend_features(client_id)
+        test_concurrent_invoice_creation(client_id)
+        test_bulk_operations()
+        test_tenant_isolation()
+        test_delta_sync()
+        test_service_catalog()
+        test_payload_formats()
+        test_admission_control()
         
         # Cleanup
         test_archive_client(client_id)